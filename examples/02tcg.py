@@ -60,3 +60,5 @@ deck.for_each_if(
 deck.render_png('tcg_{index}.png')
 # also create a PDF
 deck.render_pdf('tcg.pdf', resolution=300)
+# and quick thumbnails, a quarter of the size, from the same deck
+deck.scaled(0.25).render_png('tcg_thumb_{index}.png')
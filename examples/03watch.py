@@ -0,0 +1,47 @@
+"""
+The trading-card game from 02tcg.py, redrawn as its files change.
+
+Run this, then edit assets/02data.toml or one of the card images. Only the
+cards that change are rendered again. Press Ctrl+C to stop.
+"""
+import logging
+import os.path
+import skit
+import skit.template
+import skit.watch
+
+
+BASE_DIR = os.path.dirname(__file__)
+DATA = BASE_DIR + '/assets/02data.toml'
+
+
+def build():
+    layouts = skit.load_layouts(DATA, table='layout')
+    small_text = skit.load_font('Helvetica', 10*3)
+    large_text = skit.load_font('Helvetica', 16*3)
+
+    template = skit.Template(750, 1050)
+    template.background('#eeeeee')
+    template.layouts_map(layouts)
+    template.rectangle('border', 'black', 10)
+    template.rectangle('border', 'white', 8)
+    template.rectangle('border', 'black', 6)
+    template.text_field('name', 'name', font=large_text, color=lambda c: skit.Color(c['color']))
+    template.rectangle('art', 'gray')
+    template.image_field('image', 'art', directory=BASE_DIR + '/assets')
+    template.text_field('typeline', 'typeline', font=small_text)
+    template.filled_rectangle('textbox', '#dddddd')
+    template.text_field('text', 'text', font=small_text)
+
+    def draw_statsbox(card, data):
+        card.filled_rectangle('stats', '#cccccc')
+        card.text(data['stats'], layout='stats', font=small_text)
+
+    template.each(draw_statsbox, lambda c: 'stats' in c)
+
+    return skit.Deck.from_records(skit.template.read_records(DATA, table='cards'), template)
+
+
+# show which cards get redrawn
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+skit.watch.watch(build, 'tcg_{index}.png')
@@ -1,30 +1,15 @@
 """
 .. include:: ../README.md
 """
-import copy
+import json
+from pathlib import Path
 import warnings
 from .deck import Deck
 from .card import Card
-from ._types import Rect, Color, Alignment, Scale, LayoutDef
-
-from PIL import ImageFont
-
-
-# expose ImageFont.truetype() as skit.load_font()
-load_font = copy.copy(ImageFont.truetype)
-load_font.__doc__ = f"""
-A rename/import of [PIL.ImageFont.truetype][truetypedocs].
-
-Required arguments are:
-- `font`: A filename or file-like object containing a TrueType font.
-If the file is not found in this filename, the loader may also search in other directories, such as the `fonts/`
-directory on Windows or `/Library/Fonts/`, `/System/Library/Fonts/` and `~/Library/Fonts/` on macOS.
-- `size`: The requested size, in pixels.
-
-See the [upstream documentation][truetypedocs] for the remaining optional parameters.
-
-[truetypedocs]: https://pillow.readthedocs.io/en/stable/reference/ImageFont.html#PIL.ImageFont.truetype
-"""
+from .template import Template
+from ._types import Rect, Color, Alignment, Scale, Resampling, TextFit, LayoutDef
+from .fonts import load_font
+from ._manifest import note_source
 
 
 def as_layoutdef(incoming_dict: dict) -> dict | LayoutDef:
@@ -35,7 +20,7 @@ def as_layoutdef(incoming_dict: dict) -> dict | LayoutDef:
     Pass this to the `object_hook` parameter of `json.load()` to automatically
     convert dictionaries with the correct keys  into `LayoutDef`s.
     Correct keys are `x`, `y`, `width`, and `height`, plus optional
-    `h_align`, `v_align`, and `scale`.
+    `h_align`, `v_align`, `scale`, and `fit`.
 
     Example:
 
@@ -57,7 +42,7 @@ def as_layoutdef(incoming_dict: dict) -> dict | LayoutDef:
         'mybox': LayoutDef(
             x=0, y=0, width=100, height=25,
             h_align=Alignment.BEGIN, v_align=Alignment.BEGIN,
-            scale=Scale.FIT,
+            scale=Scale.FIT, fit=TextFit.NONE,
         ),
     }
 
@@ -71,6 +56,8 @@ def as_layoutdef(incoming_dict: dict) -> dict | LayoutDef:
                 rest['v_align'] = Alignment(incoming_dict['v_align'])
             if 'scale' in rest:
                 rest['scale'] = Scale(incoming_dict['scale'])
+            if 'fit' in rest:
+                rest['fit'] = TextFit(incoming_dict['fit'])
             try:
                 vals = incoming_dict.copy()
                 vals.update(rest)
@@ -85,14 +72,40 @@ def as_layoutdef(incoming_dict: dict) -> dict | LayoutDef:
             return incoming_dict
 
 
+def load_layouts(path: str | Path, table: str | None = None) -> dict[str, LayoutDef]:
+    """
+    Read named layouts from a JSON or TOML file using `as_layoutdef()`. If
+    the layouts are one table inside a bigger file, name it with `table`:
+
+    ```python
+    layouts = skit.load_layouts('02data.toml', table='layout')
+    ```
+    """
+    note_source(path)
+    if Path(path).suffix.lower() == '.toml':
+        import tomllib
+        with open(path, 'rb') as toml_in:
+            data = tomllib.load(toml_in)
+    else:
+        with open(path) as json_in:
+            data = json.load(json_in)
+    if table is not None:
+        data = data[table]
+    return {name: as_layoutdef(layoutdef) for name, layoutdef in data.items()}
+
+
 __all__ = [
     'Deck',
     'Card',
+    'Template',
     'Rect',
     'Color',
     'Alignment',
     'Scale',
+    'Resampling',
+    'TextFit',
     'LayoutDef',
     'load_font',
     'as_layoutdef',
+    'load_layouts',
 ]
@@ -0,0 +1,222 @@
+"""
+Drawing the flat parts of many cards at once with NumPy.
+
+Most of a typical card is backgrounds, borders, and filled boxes, and they
+sit in the same layouts on card after card. `BatchRenderer` draws a batch of
+cards into one (cards, height, width, 4) array, so a border that 500 cards
+share is a single slice assignment rather than 500 trips through ImageDraw.
+From a card's first text or image on, `SingleImageRenderer` finishes it as
+usual. Cards come out pixel-for-pixel the same as drawing them one by one.
+
+NumPy isn't a requirement of Skit; install it (`pip install numpy`) to use
+batches.
+"""
+from __future__ import annotations
+from collections import defaultdict
+from collections.abc import Sequence
+from functools import lru_cache
+import logging
+import threading
+from typing import TYPE_CHECKING, Iterator
+from skit._lazy import lazy_import
+from skit._types import Color
+from skit.render import SingleImageRenderer, DrawRectangle, compile_command
+from skit import trace
+
+if TYPE_CHECKING:
+    from skit.card import BaseLayer, Card
+
+Image = lazy_import('PIL.Image')
+ImageDraw = lazy_import('PIL.ImageDraw')
+
+
+logger = logging.getLogger(__file__)
+
+# an array each thread can draw its next batch in
+_spare = threading.local()
+
+
+class BatchRenderer:
+    "Renders many cards together, drawing their rectangles with NumPy."
+    def __init__(self):
+        try:
+            import numpy
+        except ModuleNotFoundError as e:
+            raise ModuleNotFoundError(
+                "rendering in batches needs NumPy; install it with 'pip install numpy'",
+                name='numpy',
+            ) from e
+        self._np = numpy
+
+    def render(self, cards: Sequence[Card], bases: Sequence[BaseLayer | None]) -> Iterator[Image.Image]:
+        """
+        Render `cards`, each starting from its base layer in `bases` if it
+        has one, and yield their images in the same order.
+
+        Each card is finished as it's asked for. Let go of each image before
+        asking for the next one: besides saving memory, it's faster, because
+        Pillow can reuse the memory for the next card.
+        """
+        assert len(cards) == len(bases), "mismatched cards/bases arguments"
+
+        # only cards of the same size fit in one array
+        sizes: dict[tuple[int, int], list[int]] = defaultdict(list)
+        for index, card in enumerate(cards):
+            sizes[card._width, card._height].append(index)
+
+        drawn = [None] * len(cards)
+        arrays = []
+        for (width, height), indices in sizes.items():
+            with trace.span('batch', 'card', cards=len(indices)):
+                pixels, done = self._draw_flat(
+                    width, height,
+                    [cards[index] for index in indices],
+                    [bases[index] for index in indices],
+                )
+            arrays.append(pixels)
+            for row, (index, first) in enumerate(zip(indices, done)):
+                drawn[index] = (pixels[row], first)
+
+        # whatever's left is drawn card by card
+        for card, (pixels, first) in zip(cards, drawn):
+            with trace.span('card', 'card', commands=len(card._commands) - first):
+                im = Image.fromarray(pixels)
+                # the array gets reused, so every card needs its own copy;
+                # the renderer makes one anyway when there's more to draw
+                if first < len(card._commands):
+                    yield (
+                        SingleImageRenderer(card._layouts, card._resampling)
+                        .render(card._width, card._height, card._background, card._commands[first:], base=im)
+                    )
+                else:
+                    yield im.copy()
+        # done with it, so the next batch can draw there
+        _spare.pixels = arrays[-1]
+
+    def _draw_flat(self, width: int, height: int, cards: list[Card], bases: list[BaseLayer | None]):
+        # returns the array the cards were drawn in, and how many of each
+        # card's commands are done
+        np = self._np
+        logger.debug(f"drawing {len(cards)} {width}x{height} cards as one batch")
+        pixels = self._array(len(cards), height, width)
+        # one 32-bit number per pixel, so filling a box is a plain fill
+        packed = pixels.view(np.uint32).reshape(len(cards), height, width)
+
+        # every card starts from its base or its background; cards sharing
+        # a start are filled together
+        starts: dict[object, list[int]] = defaultdict(list)
+        for index, (card, base) in enumerate(zip(cards, bases)):
+            starts[base if base is not None else card._background].append(index)
+        for start, indices in starts.items():
+            if isinstance(start, str):
+                packed[self._select(indices)] = self._pack(_background(start))
+            else:
+                pixels[self._select(indices)] = np.asarray(start.image())
+
+        # then each card's leading rectangles; step N of one card never
+        # touches another card, so grouping the same step across cards
+        # keeps every card's own drawing order
+        steps: list[dict[DrawRectangle, list[int]]] = []
+        done = []
+        # cards in a deck share their commands and layouts, so most lookups
+        # can go by identity instead of hashing layouts over and over
+        compiled: dict[tuple[int, int], object] = {}
+        for index, (card, base) in enumerate(zip(cards, bases)):
+            first = base.length if base is not None else 0
+            drawn = 0
+            for cmd in card._commands[first:]:
+                key = (id(cmd), id(card._layouts))
+                op = compiled.get(key)
+                if op is None:
+                    op = compiled[key] = compile_command(cmd, card._layouts[cmd.layout])
+                if not _can_batch(op):
+                    break
+                if drawn == len(steps):
+                    steps.append(defaultdict(list))
+                steps[drawn][op].append(index)
+                drawn += 1
+            done.append(first + drawn)
+        for step in steps:
+            for op, indices in step.items():
+                with trace.span('rect', 'op', cards=len(indices)):
+                    self._draw_rectangle(packed, self._select(indices), op)
+
+        return pixels, done
+
+    def _array(self, count: int, height: int, width: int):
+        # batches are mostly the same size, and fresh memory for each one
+        # costs more than drawing in it, so a finished batch leaves its
+        # array for the next; one still being handed out keeps its own
+        shape = (count, height, width, 4)
+        pixels = getattr(_spare, 'pixels', None)
+        _spare.pixels = None
+        if pixels is None or pixels.shape != shape:
+            pixels = self._np.empty(shape, self._np.uint8)
+        return pixels
+
+    def _select(self, indices: list[int]):
+        # a slice when the cards are all in a row, since that's a view and
+        # skips gathering them up
+        if indices[-1] - indices[0] == len(indices) - 1:
+            return slice(indices[0], indices[-1] + 1)
+        return self._np.array(indices)
+
+    def _pack(self, color: tuple[int, int, int, int]):
+        return self._np.array(color, self._np.uint8).view(self._np.uint32)[0]
+
+    def _draw_rectangle(self, packed, cards, op: DrawRectangle):
+        # the same pixels ImageDraw.rectangle() sets: corners are truncated
+        # to whole pixels and both are inside the box, and the outline is
+        # drawn over the fill unless they're the same color
+        _, height, width = packed.shape
+        x0, y0, x1, y1 = (int(v) for v in op.box)
+        fill = _ink(op.fill) if op.fill is not None else None
+        if fill is not None:
+            packed[cards, _span(y0, y1 + 1, height), _span(x0, x1 + 1, width)] = self._pack(fill)
+
+        if _ink(op.outline) == fill:
+            return
+        outline = self._pack(_ink(op.outline))
+        thickness = op.width
+        columns = _span(x0, x1 + 1, width)
+        packed[cards, _span(y0, y0 + thickness, height), columns] = outline
+        packed[cards, _span(y1 - thickness + 1, y1 + 1, height), columns] = outline
+        # the sides run between the top and bottom edges, from just below
+        # the top one to just above the bottom one; a box too short to have
+        # room between them still gets a bit of side drawn below its top
+        top, bottom = y0 + thickness, y1 - thickness + 1
+        rows = _span(top, bottom, height) if top <= bottom else _span(bottom + 1, top + 1, height)
+        packed[cards, rows, _span(x0, x0 + thickness, width)] = outline
+        packed[cards, rows, _span(x1 - thickness + 1, x1 + 1, width)] = outline
+
+
+def _can_batch(op) -> bool:
+    # anything unusual is left to ImageDraw, which also reports any errors
+    if not isinstance(op, DrawRectangle):
+        return False
+    x0, y0, x1, y1 = (int(v) for v in op.box)
+    if x1 < x0 or y1 < y0 or type(op.width) is not int or op.width <= 0:
+        return False
+    if 2 * op.width <= min(x1 - x0 + 1, y1 - y0 + 1):
+        return True
+    # an outline more than half as thick as the box leaves odd gaps in the
+    # middle with ImageDraw, unless it's the fill color and all one block
+    return op.fill is not None and _ink(op.outline) == _ink(op.fill)
+
+
+def _span(start: int, stop: int, size: int) -> slice:
+    "Rows or columns `start` up to `stop`, clipped to an image `size` long."
+    return slice(min(max(start, 0), size), min(max(stop, 0), size))
+
+
+@lru_cache(maxsize=1024)
+def _ink(color: Color) -> tuple[int, int, int, int]:
+    # let Pillow read the color, exactly as ImageDraw would
+    im = Image.new('RGBA', (1, 1))
+    ImageDraw.Draw(im).point((0, 0), fill=color)
+    return im.getpixel((0, 0))
+
+
+@lru_cache(maxsize=1024)
+def _background(color: Color) -> tuple[int, int, int, int]:
+    return Image.new('RGBA', (1, 1), color).getpixel((0, 0))
@@ -0,0 +1,33 @@
+"""
+Deferring imports until they're used.
+
+Pillow takes longer to import than the rest of Skit put together, and plenty
+of programs import Skit without drawing anything: worker processes that are
+about to be handed a card, scripts that only check their data. Modules get
+Pillow through `lazy_import()` so it's only loaded once something uses it.
+"""
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    "Return module `name`, but don't actually load it until an attribute is used."
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+
+    # a real import also makes the module an attribute of its package
+    parent, _, child = name.rpartition('.')
+    if parent:
+        setattr(sys.modules[parent], child, module)
+    return module
@@ -0,0 +1,96 @@
+"""
+Remembering what was rendered last time, so unchanged cards can be skipped,
+and which files it was made from.
+"""
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cache
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+
+logger = logging.getLogger(__file__)
+
+_MANIFEST_VERSION = 1
+
+# the files read so far by whoever is recording, if anyone is
+_sources: ContextVar[set[str] | None] = ContextVar('_sources', default=None)
+
+
+class RenderManifest:
+    """
+    A JSON file mapping each output file to the content hash of the card
+    that produced it.
+    """
+    def __init__(self, path: str | Path):
+        self._path = Path(path)
+        self._files: dict[str, str] = {}
+        try:
+            with open(self._path) as manifest_in:
+                data = json.load(manifest_in)
+            if data.get('version') == _MANIFEST_VERSION:
+                self._files = data['files']
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError):
+            logger.warning(f"ignoring unreadable manifest {self._path}")
+
+    def is_current(self, filename: str, digest: str | None) -> bool:
+        "True if `filename` exists and was rendered from a card with this `digest`."
+        return (
+            digest is not None
+            and self._files.get(filename) == digest
+            and os.path.exists(filename)
+        )
+
+    def record(self, filename: str, digest: str | None):
+        "Note that `filename` now holds a card with this `digest`."
+        if digest is None:
+            self._files.pop(filename, None)
+        else:
+            self._files[filename] = digest
+
+    def save(self):
+        # write to the side and swap, so an interrupted build can't leave
+        # a half-written manifest behind
+        temp = self._path.with_name(self._path.name + '.tmp')
+        with open(temp, 'w') as manifest_out:
+            json.dump({'version': _MANIFEST_VERSION, 'files': self._files}, manifest_out, indent=1, sort_keys=True)
+        os.replace(temp, self._path)
+
+
+def file_digest(path: str | os.PathLike) -> str:
+    "The SHA-256 of a file's contents, recomputed only when the file changes."
+    stat = os.stat(path)
+    return _file_digest(os.fspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+@cache
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file_in:
+        while chunk := file_in.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def note_source(path: str | os.PathLike):
+    "Note that cards are being made from `path`, if anyone is recording."
+    sources = _sources.get()
+    if sources is not None:
+        sources.add(os.path.abspath(path))
+
+
+@contextmanager
+def recording_sources() -> Iterator[set[str]]:
+    "Collect the paths passed to `note_source()` inside the `with` block."
+    sources: set[str] = set()
+    token = _sources.set(sources)
+    try:
+        yield sources
+    finally:
+        _sources.reset(token)
@@ -0,0 +1,124 @@
+"""
+Helpers for shipping cards to worker processes.
+
+Fonts can't be sent between processes cheaply, so cards replace each
+`FreeTypeFont` with a `skit.fonts.FontRef` when pickled, and workers load
+the font again (once per process) when unpickling.
+"""
+from __future__ import annotations
+from collections import deque
+from itertools import islice
+import os
+import threading
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator
+from skit._lazy import lazy_import
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
+# the process pool pulls in multiprocessing, which most imports of Skit
+# never need
+futures = lazy_import('concurrent.futures')
+
+
+def map_ordered(
+    fn: Callable,
+    *iterables: Iterable,
+    count: int,
+    workers: int | None = None,
+    executor: Executor | None = None,
+) -> Iterator:
+    """
+    Like `map(fn, *iterables)`, but spread across `executor` or a pool of
+    `workers` processes when one is given. Results always come back in order.
+
+    Only a few chunks of work are in flight at once, so a slow consumer (like
+    a PDF writer) doesn't end up holding every rendered card in memory.
+
+    Worker processes are started with the platform's default method. On
+    macOS and Windows that's "spawn", which imports the caller's main module
+    in each worker, so scripts using `workers` need an
+    `if __name__ == '__main__':` guard around their top-level code.
+    """
+    if executor is not None:
+        # not every Executor says how big it is, so guess at the CPU count
+        size = getattr(executor, '_max_workers', None) or os.cpu_count() or 1
+        yield from _map_windowed(executor, fn, iterables, count, size)
+    elif workers and workers > 1:
+        with futures.ProcessPoolExecutor(workers) as pool:
+            yield from _map_windowed(pool, fn, iterables, count, workers)
+    else:
+        yield from map(fn, *iterables)
+
+
+def _map_windowed(executor: Executor, fn: Callable, iterables, count: int, size: int) -> Iterator:
+    args = zip(*iterables)
+    chunksize = _chunksize(count, size)
+    pending = deque()
+    while chunk := list(islice(args, chunksize)):
+        pending.append(executor.submit(_run_chunk, fn, chunk))
+        # keep every worker busy, plus one chunk queued up behind them
+        if len(pending) > size:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def _run_chunk(fn: Callable, chunk: list[tuple]) -> list:
+    return [fn(*args) for args in chunk]
+
+
+def _chunksize(count: int, workers: int) -> int:
+    # a few chunks per worker keeps everyone busy without paying for a
+    # round-trip per card, but big chunks mean more rendered cards in flight
+    return max(1, min(8, count // (workers * 4)))
+
+
+class BackgroundWriter:
+    """
+    Runs encode-and-write jobs on a few threads while the caller carries on
+    rendering. At most `backlog` jobs wait at once; `submit()` blocks when
+    the writers fall behind, so rendered images don't pile up in memory.
+
+    Errors from a job are raised from the next `submit()` or from `close()`.
+    Use it as a context manager so everything is flushed before moving on.
+    """
+    def __init__(self, threads: int, backlog: int | None = None):
+        self._pool = futures.ThreadPoolExecutor(threads, thread_name_prefix='skit-writer')
+        self._slots = threading.BoundedSemaphore(backlog or threads * 2)
+        self._pending: deque[Future] = deque()
+
+    def submit(self, fn: Callable, *args):
+        "Run `fn(*args)` on a writer thread."
+        self._raise_errors()
+        self._slots.acquire()
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        self._pending.append(future)
+
+    def close(self):
+        "Wait for every job to finish, raising the first error if any failed."
+        try:
+            while self._pending:
+                self._pending.popleft().result()
+        finally:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def _raise_errors(self):
+        # results are collected in order; only finished jobs are checked
+        while self._pending and self._pending[0].done():
+            self._pending.popleft().result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # the caller already has an error to report; just stop
+            self._pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,288 @@
+"""
+Just enough of the TrueType/OpenType font format to embed fonts in a PDF:
+finding each character's glyph, reading glyph widths and font metrics, and
+cutting a font down to the glyphs a document uses.
+
+Subsetting keeps every glyph's number and empties the ones that aren't
+used, so a PDF can refer to glyphs by their number in the original font.
+Fonts with CFF outlines (most `.otf` files) are embedded whole.
+"""
+from functools import cached_property
+import struct
+
+
+# what a PDF needs of a TrueType font; layout tables like GSUB and kern
+# only matter to text shaping, which has already happened
+_KEEP_TABLES = {'head', 'hhea', 'maxp', 'hmtx', 'loca', 'glyf', 'cvt ', 'fpgm', 'prep', 'cmap', 'OS/2', 'name', 'post'}
+
+# composite glyph flags
+_ARGS_ARE_WORDS = 0x0001
+_HAVE_SCALE = 0x0008
+_MORE_COMPONENTS = 0x0020
+_HAVE_XY_SCALE = 0x0040
+_HAVE_TWO_BY_TWO = 0x0080
+
+
+class Sfnt:
+    "One font from a TrueType or OpenType file, or from a collection."
+    def __init__(self, data: bytes, index: int = 0):
+        offset = 0
+        if data[:4] == b'ttcf':
+            count, = struct.unpack_from('>I', data, 8)
+            if not 0 <= index < count:
+                raise ValueError(f"font collection has no font {index}")
+            offset, = struct.unpack_from('>I', data, 12 + 4 * index)
+
+        version = data[offset:offset + 4]
+        if version not in (b'\x00\x01\x00\x00', b'true', b'OTTO'):
+            raise ValueError("not a TrueType or OpenType font")
+        table_count, = struct.unpack_from('>H', data, offset + 4)
+        self.tables: dict[str, bytes] = {}
+        for record in range(table_count):
+            tag, _, start, length = struct.unpack_from('>4sIII', data, offset + 12 + 16 * record)
+            self.tables[tag.decode('latin-1')] = data[start:start + length]
+
+    @property
+    def is_cff(self) -> bool:
+        "Whether the outlines are CFF rather than TrueType."
+        return 'glyf' not in self.tables
+
+    #region Metrics
+    @cached_property
+    def units_per_em(self) -> int:
+        return struct.unpack_from('>H', self.tables['head'], 18)[0]
+
+    @cached_property
+    def bbox(self) -> tuple[int, int, int, int]:
+        "The box every glyph fits in, in font units."
+        return struct.unpack_from('>4h', self.tables['head'], 36)
+
+    @cached_property
+    def ascent(self) -> int:
+        return struct.unpack_from('>h', self.tables['hhea'], 4)[0]
+
+    @cached_property
+    def descent(self) -> int:
+        return struct.unpack_from('>h', self.tables['hhea'], 6)[0]
+
+    @cached_property
+    def cap_height(self) -> int:
+        os2 = self.tables.get('OS/2', b'')
+        if len(os2) >= 90 and struct.unpack_from('>H', os2, 0)[0] >= 2:
+            return struct.unpack_from('>h', os2, 88)[0]
+        return self.ascent
+
+    @cached_property
+    def italic_angle(self) -> float:
+        post = self.tables.get('post', b'')
+        if len(post) < 8:
+            return 0.0
+        return struct.unpack_from('>i', post, 4)[0] / 65536
+
+    @cached_property
+    def glyph_count(self) -> int:
+        return struct.unpack_from('>H', self.tables['maxp'], 4)[0]
+
+    @cached_property
+    def _advances(self) -> tuple[int, ...]:
+        # each entry is an advance width and a left side bearing
+        metric_count, = struct.unpack_from('>H', self.tables['hhea'], 34)
+        return struct.unpack_from(f'>{2 * metric_count}H', self.tables['hmtx'])[::2]
+
+    def advance(self, glyph: int) -> int:
+        "How far `glyph` moves the pen, in font units."
+        advances = self._advances
+        # glyphs past the end of the table all share the last width
+        return advances[glyph] if glyph < len(advances) else advances[-1]
+
+    @cached_property
+    def postscript_name(self) -> str:
+        "The font's PostScript name, or something close to it."
+        name = self.tables.get('name', b'')
+        if len(name) >= 6:
+            count, strings = struct.unpack_from('>2H', name, 2)
+            for record in range(count):
+                platform, encoding, _, name_id, length, offset = struct.unpack_from('>6H', name, 6 + 12 * record)
+                if name_id != 6:
+                    continue
+                raw = name[strings + offset:strings + offset + length]
+                text = raw.decode('utf-16-be' if platform in (0, 3) else 'latin-1', errors='replace')
+                if text:
+                    break
+            else:
+                text = ''
+        else:
+            text = ''
+        # names in a PDF can't hold spaces or delimiters
+        return ''.join(c for c in text if c.isascii() and c.isalnum() or c in '-_') or 'Font'
+    #endregion
+
+    #region Character map
+    @cached_property
+    def _cmap(self) -> dict[int, int]:
+        cmap = self.tables.get('cmap', b'')
+        if len(cmap) < 4:
+            return {}
+        count, = struct.unpack_from('>H', cmap, 2)
+        subtables = {}
+        for record in range(count):
+            platform, encoding, offset = struct.unpack_from('>HHI', cmap, 4 + 8 * record)
+            subtables[platform, encoding] = offset
+        # full Unicode first, then the Basic Multilingual Plane
+        for key in [(3, 10), (0, 6), (0, 4), (3, 1), (0, 3), (0, 2), (0, 1), (0, 0)]:
+            if key in subtables:
+                offset = subtables[key]
+                match struct.unpack_from('>H', cmap, offset)[0]:
+                    case 4:
+                        return _read_cmap_4(cmap, offset)
+                    case 12:
+                        return _read_cmap_12(cmap, offset)
+        return {}
+
+    def glyph(self, char: str) -> int:
+        "The glyph for `char`, or 0 (the missing-glyph box) if there isn't one."
+        return self._cmap.get(ord(char), 0)
+    #endregion
+
+    #region Subsetting
+    def subset(self, glyphs: set[int]) -> bytes:
+        """
+        A font file with only `glyphs` (and the glyphs they're built from)
+        left in. Glyph numbers don't change. Fonts with CFF outlines come
+        back whole.
+        """
+        if self.is_cff:
+            return _build(self.tables)
+
+        long_loca = struct.unpack_from('>h', self.tables['head'], 50)[0] == 1
+        loca = self.tables['loca']
+        count = self.glyph_count
+        if long_loca:
+            offsets = struct.unpack_from(f'>{count + 1}I', loca)
+        else:
+            offsets = [offset * 2 for offset in struct.unpack_from(f'>{count + 1}H', loca)]
+        glyf = self.tables['glyf']
+
+        def outline(glyph: int) -> bytes:
+            return glyf[offsets[glyph]:offsets[glyph + 1]] if glyph < count else b''
+
+        # composite glyphs are drawn from other glyphs, which must stay too
+        keep = set()
+        pending = [0, *glyphs]
+        while pending:
+            glyph = pending.pop()
+            if glyph in keep or glyph >= count:
+                continue
+            keep.add(glyph)
+            pending.extend(_components(outline(glyph)))
+
+        new_glyf = bytearray()
+        new_offsets = []
+        for glyph in range(count):
+            new_offsets.append(len(new_glyf))
+            if glyph in keep:
+                new_glyf += outline(glyph)
+                new_glyf += b'\0' * (-len(new_glyf) % 4)
+        new_offsets.append(len(new_glyf))
+
+        tables = {tag: data for tag, data in self.tables.items() if tag in _KEEP_TABLES}
+        tables['glyf'] = bytes(new_glyf)
+        tables['loca'] = struct.pack(f'>{count + 1}I', *new_offsets)
+        head = bytearray(tables['head'])
+        struct.pack_into('>h', head, 50, 1)
+        tables['head'] = bytes(head)
+        return _build(tables)
+    #endregion
+
+
+def _read_cmap_4(cmap: bytes, offset: int) -> dict[int, int]:
+    segments = struct.unpack_from('>H', cmap, offset + 6)[0] // 2
+    ends_at = offset + 14
+    starts_at = ends_at + 2 * segments + 2
+    deltas_at = starts_at + 2 * segments
+    ranges_at = deltas_at + 2 * segments
+    ends = struct.unpack_from(f'>{segments}H', cmap, ends_at)
+    starts = struct.unpack_from(f'>{segments}H', cmap, starts_at)
+    deltas = struct.unpack_from(f'>{segments}H', cmap, deltas_at)
+    ranges = struct.unpack_from(f'>{segments}H', cmap, ranges_at)
+
+    mapping = {}
+    for segment, (start, end, delta, range_offset) in enumerate(zip(starts, ends, deltas, ranges)):
+        if start == 0xFFFF:
+            continue
+        for char in range(start, end + 1):
+            if range_offset == 0:
+                glyph = (char + delta) & 0xFFFF
+            else:
+                # the offset is from where it's stored in the file
+                at = ranges_at + 2 * segment + range_offset + 2 * (char - start)
+                glyph = struct.unpack_from('>H', cmap, at)[0]
+                if glyph:
+                    glyph = (glyph + delta) & 0xFFFF
+            if glyph:
+                mapping[char] = glyph
+    return mapping
+
+
+def _read_cmap_12(cmap: bytes, offset: int) -> dict[int, int]:
+    groups, = struct.unpack_from('>I', cmap, offset + 12)
+    mapping = {}
+    for group in range(groups):
+        start, end, glyph = struct.unpack_from('>3I', cmap, offset + 16 + 12 * group)
+        for char in range(start, end + 1):
+            mapping[char] = glyph + char - start
+    return mapping
+
+
+def _components(outline: bytes) -> list[int]:
+    "The glyphs a composite glyph is made of; none for a simple one."
+    if len(outline) < 10 or struct.unpack_from('>h', outline, 0)[0] >= 0:
+        return []
+    components = []
+    at = 10
+    while True:
+        flags, glyph = struct.unpack_from('>HH', outline, at)
+        components.append(glyph)
+        at += 4 + (4 if flags & _ARGS_ARE_WORDS else 2)
+        if flags & _HAVE_SCALE:
+            at += 2
+        elif flags & _HAVE_XY_SCALE:
+            at += 4
+        elif flags & _HAVE_TWO_BY_TWO:
+            at += 8
+        if not flags & _MORE_COMPONENTS:
+            return components
+
+
+def _checksum(data: bytes) -> int:
+    data += b'\0' * (-len(data) % 4)
+    return sum(struct.unpack(f'>{len(data) // 4}I', data)) & 0xFFFFFFFF
+
+
+def _build(tables: dict[str, bytes]) -> bytes:
+    "Put a font file together from its tables."
+    tables = dict(tables)
+    # the whole-file checksum goes in head, so it's figured with a zero there
+    head = bytearray(tables['head'])
+    struct.pack_into('>I', head, 8, 0)
+    tables['head'] = bytes(head)
+
+    tags = sorted(tables)
+    power = 1
+    while power * 2 <= len(tags):
+        power *= 2
+    version = b'OTTO' if 'CFF ' in tables or 'CFF2' in tables else b'\x00\x01\x00\x00'
+    header = version + struct.pack('>4H', len(tags), power * 16, power.bit_length() - 1, (len(tags) - power) * 16)
+
+    records = bytearray()
+    body = bytearray()
+    offset = len(header) + 16 * len(tags)
+    for tag in tags:
+        data = tables[tag]
+        records += struct.pack('>4sIII', tag.encode('latin-1'), _checksum(data), offset + len(body), len(data))
+        body += data + b'\0' * (-len(data) % 4)
+
+    font = bytearray(header + records + body)
+    head_at = offset + sum(len(tables[tag]) + (-len(tables[tag]) % 4) for tag in tags[:tags.index('head')])
+    struct.pack_into('>I', font, head_at + 8, (0xB1B0AFBA - _checksum(bytes(font))) & 0xFFFFFFFF)
+    return bytes(font)
@@ -0,0 +1,175 @@
+"""
+Fitting text into layouts: breaking lines and picking a font size.
+
+Asking Pillow how wide a string is lays the whole string out again, which
+adds up when a search tries a dozen sizes on every card. Instead, each font
+(at each size) measures every character's advance width and every pair's
+kerning once, and line widths are added up from those.
+"""
+from __future__ import annotations
+from functools import lru_cache
+import math
+from typing import TYPE_CHECKING, Callable, NamedTuple
+from skit._types import TextFit
+from skit.fonts import FontRef, pack_font, unpack_font
+
+if TYPE_CHECKING:
+    from PIL.ImageFont import FreeTypeFont
+
+
+class FittedText(NamedTuple):
+    "Text broken into lines, and the font to draw them in."
+    font: FreeTypeFont
+    lines: tuple[str, ...]
+    ascent: int
+    """Distance from the top of a line to its baseline."""
+    line_height: int
+    """Distance from one baseline to the next."""
+
+
+# words repeat a lot across a deck, but a stream of unique text shouldn't
+# grow the word table forever
+_MAX_WORDS = 16 * 1024
+
+
+class FontMetrics:
+    "Advance widths and kerning for one font at one size, each measured once."
+    def __init__(self, font: FreeTypeFont):
+        self._font = font
+        self._advances: dict[str, float] = {}
+        self._kerning: dict[str, float] = {}
+        self._words: dict[str, float] = {}
+        ascent, descent = font.getmetrics()
+        self.ascent = ascent
+        self.line_height = ascent + descent
+
+    def width(self, text: str) -> float:
+        "How far drawing `text` advances the pen."
+        # this runs for every line of every size tried, so it looks in the
+        # tables directly and only calls out to measure something new
+        advances, kerning = self._advances, self._kerning
+        total = 0.0
+        previous = None
+        for char in text:
+            advance = advances.get(char)
+            total += advance if advance is not None else self._advance(char)
+            if previous is not None:
+                pair = previous + char
+                kern = kerning.get(pair)
+                total += kern if kern is not None else self._kern(pair)
+            previous = char
+        return total
+
+    def advances(self, text: str) -> list[float]:
+        "How far the pen moves past each character of `text`, kerning included."
+        result = [self._advance(char) for char in text]
+        for index in range(len(text) - 1):
+            result[index] += self._kern(text[index:index + 2])
+        return result
+
+    def append(self, width: float, previous: str, word: str) -> float:
+        """
+        The width of a line that's `width` wide and ends with `previous`
+        once `word` is added to its end.
+        """
+        word_width = self._words.get(word)
+        if word_width is None:
+            if len(self._words) >= _MAX_WORDS:
+                self._words.clear()
+            word_width = self._words[word] = self.width(word)
+        if previous and word:
+            word_width += self._kern(previous + word[0])
+        return width + word_width
+
+    def _advance(self, char: str) -> float:
+        advance = self._advances.get(char)
+        if advance is None:
+            advance = self._advances[char] = self._font.getlength(char)
+        return advance
+
+    def _kern(self, pair: str) -> float:
+        kerning = self._kerning.get(pair)
+        if kerning is None:
+            kerning = self._kerning[pair] = (
+                self._font.getlength(pair) - self._advance(pair[0]) - self._advance(pair[1])
+            )
+        return kerning
+
+
+@lru_cache(maxsize=1024)
+def metrics(font: FreeTypeFont) -> FontMetrics:
+    "The shared `FontMetrics` for `font`."
+    return FontMetrics(font)
+
+
+def fit_text(text: str, font: FreeTypeFont, fit: TextFit, width: float, height: float) -> FittedText:
+    "Break `text` into lines and pick a size for `font` as `fit` says."
+    match fit:
+        case TextFit.WRAP:
+            font_metrics = metrics(font)
+            lines = [line for line, _ in wrap(text, font_metrics, width)]
+        case TextFit.SHRINK:
+            lines = text.split('\n')
+            font = _largest_fitting(font, lambda m: (
+                len(lines) * m.line_height <= height
+                and all(m.width(line) <= width for line in lines)
+            ))
+            font_metrics = metrics(font)
+        case TextFit.SHRINK_WRAP:
+            def fits(m: FontMetrics) -> bool:
+                # a long word can still be too wide for a line of its own
+                wrapped = wrap(text, m, width)
+                return len(wrapped) * m.line_height <= height and all(w <= width for _, w in wrapped)
+
+            font = _largest_fitting(font, fits)
+            font_metrics = metrics(font)
+            lines = [line for line, _ in wrap(text, font_metrics, width)]
+        case _:
+            raise ValueError(f"fit value '{fit}' unrecognized")
+
+    return FittedText(font, tuple(lines), font_metrics.ascent, font_metrics.line_height)
+
+
+def wrap(text: str, font_metrics: FontMetrics, width: float) -> list[tuple[str, float]]:
+    """
+    Break `text` between words so each line fits in `width`, keeping any
+    line breaks already in it. A word too long for a line gets one to itself.
+    Returns each line with its width.
+    """
+    lines = []
+    for paragraph in text.split('\n'):
+        line = None
+        for word in paragraph.split(' '):
+            if line is None:
+                line, line_width = word, font_metrics.append(0.0, '', word)
+                continue
+            # only the new word needs measuring, not the whole line again
+            candidate_width = font_metrics.append(line_width, line[-1:], ' ' + word)
+            if candidate_width <= width:
+                line, line_width = f"{line} {word}", candidate_width
+            else:
+                lines.append((line, line_width))
+                line, line_width = word, font_metrics.append(0.0, '', word)
+        lines.append((line, line_width))
+    return lines
+
+
+def _largest_fitting(font: FreeTypeFont, fits: Callable[[FontMetrics], bool]) -> FreeTypeFont:
+    # sizes are searched in whole pixels, from 1 up to the font's own size
+    if fits(metrics(font)):
+        return font
+    ref = pack_font(font)
+    if not isinstance(ref, FontRef):
+        # only fonts loaded from a file can be loaded again at another size
+        return font
+
+    low, high = 1, math.ceil(font.size) - 1
+    best = 1
+    while low <= high:
+        size = (low + high) // 2
+        if fits(metrics(unpack_font(ref._replace(size=size)))):
+            best = size
+            low = size + 1
+        else:
+            high = size - 1
+    return unpack_font(ref._replace(size=best))
@@ -1,7 +1,9 @@
 from enum import Enum
-from typing import NamedTuple, NewType
+from typing import TYPE_CHECKING, NamedTuple, NewType
 from numbers import Real
-from PIL.ImageFont import FreeTypeFont
+
+if TYPE_CHECKING:
+    from PIL.ImageFont import FreeTypeFont
 
 class Rect(NamedTuple):
     "A rectangle, the basic data structure used throughout Skit."
@@ -37,6 +39,26 @@ class Scale(Enum):
     """Disable scaling."""
 
 
+class Resampling(Enum):
+    "How carefully art is resized to fit its layout."
+    FAST = 'fast'
+    """Decode and shrink art in big steps, then smooth it with a bilinear filter. Good for proofs and thumbnails."""
+    BEST = 'best'
+    """Take only small steps, so the bicubic filter that finishes the job still sees plenty of detail."""
+
+
+class TextFit(Enum):
+    "How text is fit into its layout."
+    NONE = 'none'
+    """Draw a single line at the font's size, even if it doesn't fit."""
+    WRAP = 'wrap'
+    """Break lines between words to fit the layout's width."""
+    SHRINK = 'shrink'
+    """Keep one line, shrinking the font until it fits the layout."""
+    SHRINK_WRAP = 'shrink_wrap'
+    """Break lines to fit the width, shrinking the font until all the lines fit the layout."""
+
+
 class LayoutDef(NamedTuple):
     "A box for drawing into plus alignment information for the box's contents."
     x: Real
@@ -53,6 +75,8 @@ class LayoutDef(NamedTuple):
     """Specify vertical alignment."""
     scale: Scale = Scale.FIT
     """Specify how (and if) images are scaled."""
+    fit: TextFit = TextFit.NONE
+    """Specify how text is wrapped and sized to fit. Fonts never grow past the size they were loaded at."""
 
 
 # color - thin wrapper on str right now, and there are only
@@ -60,11 +84,21 @@ class LayoutDef(NamedTuple):
 # https://pillow.readthedocs.io/en/stable/reference/ImageColor.html
 Color = NewType('Color', str)
 
+
+def __getattr__(name):
+    # FreeTypeFont is looked up on first use so importing Skit doesn't
+    # import Pillow
+    if name == 'FreeTypeFont':
+        from PIL.ImageFont import FreeTypeFont
+        return FreeTypeFont
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __all__ = [
     'Real',
     'FreeTypeFont',
     'Rect',
     'Alignment',
+    'TextFit',
     'LayoutDef',
     'Color',
 ]
\ No newline at end of file
@@ -0,0 +1,409 @@
+"""
+Process-wide caches used while rendering.
+
+Rendering a deck tends to draw the same few pieces of art and the same few
+strings over and over. Skit keeps decoded, ready-to-composite copies of those
+in memory so each one is only decoded, resized, or rasterized once per process.
+
+```python
+import skit.cache
+
+deck.render_png('card_{index}.png')
+print(skit.cache.asset_cache.stats())
+print(skit.cache.text_cache.stats())
+```
+
+Art also lasts between runs. The first time a piece of art is resized for a
+layout, `art_store` saves the result under `cache_dir()`, uncompressed, so
+later builds and worker processes map it straight into memory instead of
+decoding and resizing the original again.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+import hashlib
+import logging
+import mmap
+import os
+from pathlib import Path
+import struct
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Generic, NamedTuple, TypeVar
+from skit._lazy import lazy_import
+from skit._manifest import file_digest
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+logger = logging.getLogger(__file__)
+
+Image = lazy_import('PIL.Image')
+
+V = TypeVar('V')
+
+
+class CacheStats(NamedTuple):
+    "A snapshot of a cache's counters."
+    hits: int
+    """Lookups answered from the cache."""
+    misses: int
+    """Lookups that had to load the value."""
+    evictions: int
+    """Entries dropped to stay within budget."""
+    entries: int
+    """Number of entries currently held."""
+    size: int
+    """Bytes currently held."""
+    budget: int
+    """Maximum bytes the cache will hold."""
+
+
+class LRUCache(Generic[V]):
+    "A thread-safe least-recently-used cache bounded by a byte budget."
+    def __init__(self, budget: int, sizeof: Callable[[V], int]):
+        """
+        Create a cache holding at most `budget` bytes, as measured by calling
+        `sizeof` on each value.
+        """
+        self._budget = budget
+        self._sizeof = sizeof
+        self._entries: OrderedDict[Hashable, tuple[V, int]] = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, load: Callable[[], V]) -> V:
+        "Return the value for `key`, calling `load()` to create it on a miss."
+        with self._lock:
+            if key in self._entries:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+            self._misses += 1
+
+        # load outside the lock so a slow decode doesn't block other threads
+        value = load()
+        size = self._sizeof(value)
+
+        with self._lock:
+            if key in self._entries:
+                # someone else loaded it while we were busy
+                return self._entries[key][0]
+            if size > self._budget:
+                logger.debug(f"{key} is larger than the whole cache, not storing it")
+                return value
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self._budget:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self._evictions += 1
+
+        return value
+
+    def resize(self, budget: int):
+        "Change the byte budget, evicting entries if necessary."
+        with self._lock:
+            self._budget = budget
+            while self._size > self._budget:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self._evictions += 1
+
+    def clear(self):
+        "Drop every entry and reset the counters."
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def stats(self) -> CacheStats:
+        "Return the current hit/miss counters and memory use."
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                size=self._size,
+                budget=self._budget,
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _image_bytes(im) -> int:
+    return im.width * im.height * len(im.getbands())
+
+
+asset_cache: LRUCache = LRUCache(256 * 1024 * 1024, _image_bytes)
+"""
+Decoded, resized, RGBA-converted art, keyed by source path, modification
+time, target size, and `skit.Scale` mode. Holds up to 256 MiB by default;
+call `asset_cache.resize()` to change that.
+"""
+
+
+text_cache: LRUCache = LRUCache(64 * 1024 * 1024, lambda entry: _image_bytes(entry[0]))
+"""
+Rasterized text masks and their offsets from the anchor point, keyed by
+text, font, and anchor. Color isn't part of the key, since the same mask
+can be filled with any color. Holds up to 64 MiB by default.
+"""
+
+
+def cache_dir() -> Path:
+    """
+    Where Skit keeps caches that last between runs, like the index of
+    installed fonts. Set the `SKIT_CACHE_DIR` environment variable to use a
+    different directory. It isn't created until something is saved there.
+    """
+    if override := os.environ.get('SKIT_CACHE_DIR'):
+        return Path(override)
+    if sys.platform == 'win32':
+        return Path(os.environ.get('LOCALAPPDATA') or Path.home() / 'AppData' / 'Local', 'skit', 'Cache')
+    if sys.platform == 'darwin':
+        return Path.home() / 'Library' / 'Caches' / 'skit'
+    return Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache', 'skit')
+
+
+#region Art store
+# Each stored piece of art is one file: a small header, then its RGBA pixels
+# exactly as Pillow holds them in memory. The name pairs a hash of the source
+# path and target size with a hash of the source's contents, so when a
+# source changes, its new copy replaces the old one.
+_ART_HEADER = struct.Struct('<4sHHII')
+_ART_MAGIC = b'SKIT'
+_ART_VERSION = 1
+
+# from Python 3.13, a map on Unix doesn't have to keep its file open;
+# otherwise every piece of art left mapped would hold a file descriptor
+_MMAP_OPTIONS = {'trackfd': False} if sys.version_info >= (3, 13) and sys.platform != 'win32' else {}
+
+# a crashed writer can leave a temporary file behind
+_STALE_TEMP_SECONDS = 60 * 60
+
+
+class ArtStore:
+    """
+    Resized, RGBA-converted art kept on disk between runs, bounded by a byte
+    budget. The least recently used files are deleted to stay within it.
+    """
+    def __init__(self, budget: int):
+        """
+        Create a store holding at most `budget` bytes. A budget of 0 turns
+        it off.
+        """
+        self._budget = budget
+        # bytes on disk as of the last look, plus what's been saved since
+        self._usage: int | None = None
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> Path:
+        "Where the art is kept."
+        return cache_dir() / 'art'
+
+    def get(
+        self,
+        source: str | os.PathLike,
+        variant: Hashable,
+        load: Callable[[], Image.Image],
+    ) -> Image.Image:
+        """
+        Return the stored copy of `source` prepared as `variant` describes,
+        calling `load()` to create it on a miss. `variant` must look the same
+        in every process, so use plain values like numbers and enums. Stored
+        copies are read-only.
+        """
+        if self._budget <= 0:
+            return load()
+
+        prefix = hashlib.sha256(f"{os.path.abspath(source)}\0{variant!r}".encode()).hexdigest()[:32]
+        path = self.directory / f"{prefix}-{file_digest(source)[:32]}.rgba"
+        art = _read_art(path)
+        if art is not None:
+            with self._lock:
+                self._hits += 1
+            try:
+                # modification times are what collecting goes by
+                os.utime(path)
+            except OSError:
+                pass
+            return art
+
+        with self._lock:
+            self._misses += 1
+        art = load()
+        self._save(path, prefix, art)
+        return art
+
+    def resize(self, budget: int):
+        "Change the byte budget, deleting files if necessary."
+        with self._lock:
+            self._budget = budget
+        self._collect()
+
+    def clear(self):
+        "Delete every stored file and reset the counters."
+        for _, path, _ in self._scan(include_temp=False):
+            _remove(path)
+        with self._lock:
+            self._usage = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def stats(self) -> CacheStats:
+        "Return this process's hit/miss counters and what's on disk."
+        files = self._scan(include_temp=False)
+        size = sum(file_size for _, _, file_size in files)
+        with self._lock:
+            self._usage = size
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(files),
+                size=size,
+                budget=self._budget,
+            )
+
+    def _save(self, path: Path, prefix: str, art: Image.Image):
+        if art.mode != 'RGBA' or not art.width or not art.height:
+            return
+        size = _ART_HEADER.size + art.width * art.height * 4
+        if size > self._budget:
+            logger.debug(f"{path.name} is larger than the whole store, not saving it")
+            return
+
+        # write to the side and swap, so other processes never see half a file
+        temp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp, 'wb') as art_out:
+                art_out.write(_ART_HEADER.pack(_ART_MAGIC, _ART_VERSION, 0, art.width, art.height))
+                art_out.write(art.tobytes())
+            os.replace(temp, path)
+        except OSError as e:
+            logger.debug(f"couldn't save {path.name}: {e}")
+            _remove(temp)
+            return
+
+        # copies made from an older version of the source can't be used again
+        for old in path.parent.glob(f"{prefix}-*.rgba"):
+            if old != path:
+                _remove(old)
+
+        with self._lock:
+            if self._usage is not None:
+                self._usage += size
+            over = self._usage is None or self._usage > self._budget
+        if over:
+            self._collect()
+
+    def _collect(self):
+        files = self._scan(include_temp=True)
+        files.sort()
+        size = sum(file_size for _, _, file_size in files)
+        evicted = 0
+        now = time.time_ns()
+        for mtime, path, file_size in files:
+            is_temp = path.suffix == '.tmp'
+            if is_temp and now - mtime < _STALE_TEMP_SECONDS * 1_000_000_000:
+                continue
+            if not is_temp and size <= self._budget:
+                continue
+            if _remove(path):
+                size -= file_size
+                evicted += not is_temp
+        if evicted:
+            logger.debug(f"deleted {evicted} stored art files")
+        with self._lock:
+            self._usage = size
+            self._evictions += evicted
+
+    def _scan(self, include_temp: bool) -> list[tuple[int, Path, int]]:
+        # (modification time, path, size) of each file in the store
+        files = []
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return files
+        for entry in entries:
+            if not entry.name.endswith('.rgba') and not (include_temp and entry.name.endswith('.tmp')):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime_ns, Path(entry.path), stat.st_size))
+        return files
+
+
+def _read_art(path: Path) -> Image.Image | None:
+    try:
+        with open(path, 'rb') as art_in:
+            mapped = mmap.mmap(art_in.fileno(), 0, access=mmap.ACCESS_READ, **_MMAP_OPTIONS)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        # empty files can't be mapped
+        logger.debug(f"couldn't read {path.name}: {e}")
+        return None
+
+    if len(mapped) >= _ART_HEADER.size:
+        magic, version, _, width, height = _ART_HEADER.unpack_from(mapped)
+        if magic == _ART_MAGIC and version == _ART_VERSION and len(mapped) == _ART_HEADER.size + width * height * 4:
+            if _MMAP_OPTIONS:
+                # the image reads its pixels straight from the mapped file
+                return Image.frombuffer('RGBA', (width, height), memoryview(mapped)[_ART_HEADER.size:], 'raw', 'RGBA', 0, 1)
+            # each open map would hold a file descriptor, so copy it out
+            try:
+                return Image.frombytes('RGBA', (width, height), mapped[_ART_HEADER.size:])
+            finally:
+                mapped.close()
+    logger.debug(f"ignoring unreadable {path.name}")
+    mapped.close()
+    return None
+
+
+def _remove(path: Path) -> bool:
+    try:
+        os.remove(path)
+    except OSError:
+        # already gone, or still open in another process on Windows
+        return False
+    return True
+
+
+art_store: ArtStore = ArtStore(1024 * 1024 * 1024)
+"""
+Resized art saved between runs in a directory under `cache_dir()`, keyed by
+source path and contents, target size, and `skit.Scale` mode. Holds up to
+1 GiB by default; call `art_store.resize()` to change that, or resize it to 0
+to stop using it.
+"""
+#endregion
+
+
+__all__ = [
+    'CacheStats',
+    'LRUCache',
+    'ArtStore',
+    'asset_cache',
+    'text_cache',
+    'art_store',
+    'cache_dir',
+]
@@ -1,12 +1,29 @@
+from __future__ import annotations
 from collections.abc import Sequence
+from enum import Enum
+import hashlib
+import json
 import logging
+import os
 from pathlib import Path
-from typing import Mapping
-from PIL import Image
-from skit._types import Real, LayoutDef, Color, FreeTypeFont, Alignment
-from skit.render import DrawCommand, SingleImageRenderer
+import uuid
+from typing import TYPE_CHECKING, Mapping
+from skit._lazy import lazy_import
+from skit._types import Real, LayoutDef, Color, Alignment, Scale, Resampling, TextFit
+from skit.render import SingleImageRenderer, TextCommand, RectangleCommand, ImageCommand, scale_command
+from skit.fonts import FontRef, pack_font, unpack_font
+from skit._manifest import file_digest
+from skit.encode import DEFAULT, Encoder
+from skit.pdf import VectorPdfWriter
+from skit import trace
 from abc import ABC, abstractmethod
 
+if TYPE_CHECKING:
+    from PIL.ImageFont import FreeTypeFont
+
+Image = lazy_import('PIL.Image')
+ImageFont = lazy_import('PIL.ImageFont')
+
 
 logger = logging.getLogger(__file__)
 
@@ -15,6 +32,12 @@ class CardManipulation(ABC):
     @abstractmethod
     def background(self, color: str): pass
 
+    @abstractmethod
+    def encoder(self, encoder: Encoder): pass
+
+    @abstractmethod
+    def resampling(self, resampling: Resampling): pass
+
     @abstractmethod
     def layout(self, name: str, layoutdef: LayoutDef): pass
 
@@ -68,8 +91,15 @@ class Card(CardManipulation):
         self._width = width
         self._height = height
         self._layouts = {}
+        # a Deck may hand its cards one shared layout table; if so, a card
+        # copies it before making changes of its own
+        self._layouts_shared = False
         self._background = '#ffffff00'
+        self._encoder = DEFAULT
+        self._resampling = Resampling.BEST
         self._commands = []
+        # how many times the size this card was designed at it is
+        self._scale = 1.0
 
     def background(self, color: str):
         "Set the background color for this card."
@@ -78,21 +108,33 @@ class Card(CardManipulation):
         logger.debug(f"setting background to {color}")
         self._background = color
 
+    def encoder(self, encoder: Encoder):
+        """
+        Choose the file format and compression used by `render_png()`. See
+        `skit.encode` for presets.
+        """
+        assert isinstance(encoder, Encoder)
+
+        logger.debug(f"setting encoder to {encoder}")
+        self._encoder = encoder
+
+    def resampling(self, resampling: Resampling):
+        """
+        Choose how carefully art is resized: `Resampling.BEST` (the default)
+        or the quicker `Resampling.FAST`.
+        """
+        assert isinstance(resampling, Resampling)
+
+        logger.debug(f"setting resampling to {resampling}")
+        self._resampling = resampling
+
     def layout(self, name: str, layoutdef: LayoutDef):
         "Create a new layout for this card."
         assert Alignment(layoutdef.h_align)
         assert Alignment(layoutdef.v_align)
 
         logger.debug(f"creating layout area {name}")
-        self._layouts[name] = {
-            'x': layoutdef.x,
-            'y': layoutdef.y,
-            'width': layoutdef.width,
-            'height': layoutdef.height,
-            'h_align': layoutdef.h_align,
-            'v_align': layoutdef.v_align,
-            'scale': layoutdef.scale,
-        }
+        self._own_layouts()[name] = normalize_layoutdef(layoutdef)
     
     def layouts(self, names: Sequence[str], layoutdefs: Sequence[LayoutDef]):
         "Create multiple layouts for this card."
@@ -110,86 +152,331 @@ class Card(CardManipulation):
         "Add text to this card."
         assert type(text) is str
 
-        if layout in self._layouts:
-            logger.debug(f"adding '{text}' in {layout}")
-            self._commands.append({
-                'op': DrawCommand.TEXT,
-                'layout': layout,
-                'text': text,
-                'font': font,
-                'color': color,
-            })
-        else:
-            raise KeyError(f"missing layout '{layout}'")
+        logger.debug(f"adding '{text}' in {layout}")
+        self._add_command(TextCommand(layout, text, font, color))
 
     def rectangle(self, layout: str, color: Color | None = None, thickness: Real | None = None):
         "Draw a rectangle on this card."
-        if layout in self._layouts:
-            logger.debug(f"adding rectangle for {layout}")
-            self._commands.append({
-                'op': DrawCommand.RECTANGLE,
-                'layout': layout,
-                'color': color,
-                'thickness': thickness,
-                'filled': False,
-            })
-        else:
-            raise KeyError(f"missing layout '{layout}'")
+        logger.debug(f"adding rectangle for {layout}")
+        self._add_command(RectangleCommand(layout, color, thickness, filled=False))
 
     def filled_rectangle(self, layout: str, color: Color):
         "Draw a filled rectangle on this card."
-        if layout in self._layouts:
-            logger.debug(f"adding rectangle for {layout}")
-            self._commands.append({
-                'op': DrawCommand.RECTANGLE,
-                'layout': layout,
-                'color': color,
-                'thickness': 1,
-                'filled': True,
-            })
-        else:
-            raise KeyError(f"missing layout '{layout}'")
+        logger.debug(f"adding rectangle for {layout}")
+        self._add_command(RectangleCommand(layout, color, 1, filled=True))
 
     def image(self, image: Path, layout: str):
         "Draw an external image on this card."
-        if layout in self._layouts:
-            logger.debug(f"adding image for {layout}")
-            self._commands.append({
-                'op': DrawCommand.IMAGE,
-                'layout': layout,
-                'image': image,
-            })
+        logger.debug(f"adding image for {layout}")
+        self._add_command(ImageCommand(layout, image))
+
+    def _add_command(self, command):
+        # commands are immutable, so a Deck passes the same one to every card
+        if command.layout in self._layouts:
+            self._commands.append(command)
         else:
-            raise KeyError(f"missing layout '{layout}'")
+            raise KeyError(f"missing layout '{command.layout}'")
+
+    def scaled(self, factor: float) -> Card:
+        """
+        A copy of this card `factor` times the size, with its layouts, lines,
+        fonts, and art all scaled together. `card.scaled(0.25)` makes a quick
+        thumbnail with a sixteenth of the pixels; `card.scaled(2)` makes
+        sharper print output. Its PDFs come out the same physical size as
+        this card's, so pass the same `resolution` to `render_pdf()`.
+        """
+        return self._scaled(factor, {}, {})
+
+    def _scaled(self, factor: float, layouts: dict[int, dict], commands: dict[int, object]) -> Card:
+        # a deck's cards share their layouts and many of their commands, so
+        # `layouts` and `commands` map each one seen so far to its scaled
+        # copy, letting the scaled cards share them in the same way
+        assert factor > 0, "scale factor must be positive"
+
+        card = Card(round(self._width * factor), round(self._height * factor))
+        card._background = self._background
+        card._encoder = self._encoder
+        card._resampling = self._resampling
+        card._scale = self._scale * factor
+
+        scaled_layouts = layouts.get(id(self._layouts))
+        if scaled_layouts is None:
+            scaled_layouts = layouts[id(self._layouts)] = {
+                name: scale_layoutdef(layoutdef, factor) for name, layoutdef in self._layouts.items()
+            }
+        card._layouts = scaled_layouts
+        card._layouts_shared = True
+
+        for cmd in self._commands:
+            scaled = commands.get(id(cmd))
+            if scaled is None:
+                scaled = commands[id(cmd)] = scale_command(cmd, factor)
+            card._commands.append(scaled)
+        return card
+
+    def _own_layouts(self) -> dict[str, LayoutDef]:
+        if self._layouts_shared:
+            self._layouts = dict(self._layouts)
+            self._layouts_shared = False
+        return self._layouts
 
     def render_png(self, filename: str):
-        "Render this card as a PNG."
+        """
+        Render this card as a PNG, or in whatever format was chosen with
+        `encoder()`.
+        """
         logger.debug(f"rendering {filename}")
 
-        im = (
-            SingleImageRenderer(self._layouts)
-            .render(self._width, self._height, self._background, self._commands)
-        )
-        im.save(filename, format='PNG')
+        self._write_png(self._render(), filename)
 
-    def render_pdf(self, filename: str, resolution: int, single_file=True):
+    def render_pdf(self, filename: str, resolution: int, single_file=True, vector: bool = False):
         """
         Render this card as a PDF. It makes no sense to render a single
         card to multiple files, so `single_file` is ignored. PDFs don't
         support the alpha channel, so remove it.
+
+        If `vector` is True, the card is drawn as text, shapes, and images
+        rather than as one bitmap; see `skit.pdf.VectorPdfWriter`.
         """
         logger.debug(f"rendering {filename}")
 
-        im = self._get_rgb_image_for_pdf(resolution)
-        im.save(filename, format='PDF', resolution=resolution)
+        if vector:
+            self._write_vector_pdf(filename, resolution)
+        else:
+            self._write_pdf(self._get_rgb_image_for_pdf(resolution), filename, resolution)
 
-    def _get_rgb_image_for_pdf(self, resolution: int):
+    def _get_rgb_image_for_pdf(self, resolution: int, base: BaseLayer | None = None):
         logging.debug(f"rendering RGB image")
 
-        im = (
-            SingleImageRenderer(self._layouts)
-            .render(self._width, self._height, self._background, self._commands)
-        )
+        return self._flatten_for_pdf(self._render(base))
+
+    def _flatten_for_pdf(self, im: Image.Image) -> Image.Image:
         final = Image.new('RGB', im.size, self._background)
         final.paste(im)
         return final
+
+    def _render(self, base: BaseLayer | None = None) -> Image.Image:
+        with trace.span('card', 'card', commands=len(self._commands)):
+            if base is None:
+                return (
+                    SingleImageRenderer(self._layouts, self._resampling)
+                    .render(self._width, self._height, self._background, self._commands)
+                )
+            return (
+                SingleImageRenderer(self._layouts, self._resampling)
+                .render(
+                    self._width, self._height, self._background,
+                    self._commands[base.length:],
+                    base=base.image(),
+                )
+            )
+
+    def _write_png(self, im: Image.Image, filename: str):
+        with trace.span(self._encoder.format.value, 'encode', filename=filename):
+            self._encoder.save(im, filename)
+
+    def _write_pdf(self, im: Image.Image, filename: str, resolution: int):
+        with trace.span('pdf', 'encode', filename=filename):
+            im.save(filename, format='PDF', resolution=resolution * self._scale)
+
+    def _write_vector_pdf(self, filename: str, resolution: int):
+        with VectorPdfWriter(filename, resolution) as pdf:
+            pdf.add_card(self)
+
+    def content_hash(self) -> str | None:
+        """
+        A stable hash of everything that affects how this card looks: its
+        size, background, layouts, and drawing commands, including the
+        contents of the fonts and image files they use. Cards with the same
+        hash render the same.
+
+        Returns `None` if the card uses something that can't be hashed, such
+        as a font loaded from a file-like object.
+        """
+        try:
+            commands = [
+                {
+                    key: _hashable(key, value)
+                    for key, value in {
+                        'op': cmd.op,
+                        **cmd._asdict(),
+                        'layout': self._layouts[cmd.layout],
+                    }.items()
+                }
+                for cmd in self._commands
+            ]
+        except _Unhashable as e:
+            logger.debug(f"can't hash card: {e}")
+            return None
+
+        encoder = [self._encoder.format.value, *self._encoder[1:]]
+        content = [_HASH_VERSION, self._width, self._height, self._background, encoder, self._resampling.value, commands]
+        return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+    #region Pickling
+    # Cards are pickled to send them to worker processes. Fonts travel
+    # as a FontRef (path, size, ...) and get loaded again on the other side.
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_commands'] = [
+            cmd._replace(font=pack_font(cmd.font)) if isinstance(cmd, TextCommand) else cmd
+            for cmd in self._commands
+        ]
+        return state
+
+    def __setstate__(self, state):
+        state['_commands'] = [
+            cmd._replace(font=unpack_font(cmd.font)) if isinstance(cmd, TextCommand) else cmd
+            for cmd in state['_commands']
+        ]
+        self.__dict__.update(state)
+    #endregion
+
+
+def scale_layoutdef(layoutdef: LayoutDef, factor: float) -> LayoutDef:
+    "`layoutdef` on a card scaled by `factor`, in whole pixels."
+    # edges are rounded rather than sizes, so layouts that meet still meet
+    left, top = round(layoutdef.x * factor), round(layoutdef.y * factor)
+    return layoutdef._replace(
+        x=left,
+        y=top,
+        width=round((layoutdef.x + layoutdef.width) * factor) - left,
+        height=round((layoutdef.y + layoutdef.height) * factor) - top,
+    )
+
+
+def normalize_layoutdef(layoutdef: LayoutDef) -> LayoutDef:
+    "Check a layoutdef and convert its alignment and scale values to enums."
+    normalized = LayoutDef(
+        layoutdef.x, layoutdef.y, layoutdef.width, layoutdef.height,
+        Alignment(layoutdef.h_align), Alignment(layoutdef.v_align), Scale(layoutdef.scale),
+        TextFit(layoutdef.fit),
+    )
+    # LayoutDefs are immutable, so keep the caller's own object when it's
+    # already well-formed and let every card given it share one copy
+    if type(layoutdef) is LayoutDef and layoutdef == normalized:
+        return layoutdef
+    return normalized
+
+
+# bump this whenever a change to rendering would change the pixels of
+# an otherwise-identical card
+_HASH_VERSION = 3
+
+
+class _Unhashable(Exception):
+    pass
+
+
+def _hashable(key, value):
+    "Turn a command or layout value into something JSON can encode stably."
+    match value:
+        case None | bool() | int() | float() | str() if key != 'image':
+            return value
+        case Enum():
+            return value.value
+        case LayoutDef():
+            return {k: _hashable(k, v) for k, v in value._asdict().items()}
+        case FontRef():
+            return [*value, _file_digest(value.path)]
+        case ImageFont.FreeTypeFont():
+            font = pack_font(value)
+            if not isinstance(font, FontRef):
+                raise _Unhashable(f"font {value} isn't backed by a file")
+            return _hashable(key, font)
+        case _ if key == 'image':
+            return [os.fspath(value), _file_digest(value)]
+        case _:
+            raise _Unhashable(f"don't know how to hash {key}={value!r}")
+
+
+def _file_digest(path) -> str:
+    # a file that can't be read can't be hashed; rendering the card will
+    # raise the proper error for it
+    try:
+        return file_digest(path)
+    except OSError as e:
+        raise _Unhashable(f"can't read {os.fspath(path)}: {e}") from e
+
+
+class BaseLayer:
+    """
+    The drawing every card in a deck starts with, rendered once. Cards
+    start from a copy of it and only draw their remaining commands.
+
+    When sent to a worker process, only the commands travel. Each process
+    renders the base the first time it needs it.
+    """
+    # rendered bases in this process, by token; only the latest is kept
+    _rendered: dict[str, Image.Image] = {}
+
+    def __init__(self, template: Card):
+        self._template = template
+        self._token = uuid.uuid4().hex
+        self.length = len(template._commands)
+        """How many commands at the start of each card the base covers."""
+
+    @classmethod
+    def common_to(cls, cards: Sequence[Card]) -> BaseLayer | None:
+        """
+        Find the longest run of commands that every card in `cards` starts
+        with, or `None` if they don't share one.
+        """
+        if len(cards) < 2:
+            return None
+
+        first = cards[0]
+        length = len(first._commands)
+        for card in cards[1:]:
+            if (card._width, card._height, card._background, card._resampling) != (first._width, first._height, first._background, first._resampling):
+                return None
+            length = min(length, len(card._commands))
+            same_layouts = card._layouts is first._layouts
+            for index in range(length):
+                mine, theirs = first._commands[index], card._commands[index]
+                if mine is not theirs and mine != theirs:
+                    length = index
+                    break
+                if not same_layouts and card._layouts[theirs.layout] != first._layouts[mine.layout]:
+                    length = index
+                    break
+            if length == 0:
+                return None
+
+        logger.debug(f"{length} commands shared by all {len(cards)} cards")
+        template = Card(first._width, first._height)
+        template._background = first._background
+        template._resampling = first._resampling
+        template._commands = first._commands[:length]
+        template._layouts = {cmd.layout: first._layouts[cmd.layout] for cmd in template._commands}
+        return cls(template)
+
+    def scaled(self, factor: float) -> BaseLayer:
+        "The same base for cards scaled by `factor`."
+        return BaseLayer(self._template.scaled(factor))
+
+    def fits(self, card: Card) -> bool:
+        "Whether `card` starts with exactly the drawing this base covers."
+        template = self._template
+        if (
+            (card._width, card._height, card._background, card._resampling)
+            != (template._width, template._height, template._background, template._resampling)
+        ):
+            return False
+        if len(card._commands) < self.length:
+            return False
+        for mine, theirs in zip(template._commands, card._commands):
+            if mine is not theirs and mine != theirs:
+                return False
+            if card._layouts[theirs.layout] != template._layouts[mine.layout]:
+                return False
+        return True
+
+    def image(self) -> Image.Image:
+        "The rendered base. Don't draw on it; draw on a copy."
+        im = BaseLayer._rendered.get(self._token)
+        if im is None:
+            im = self._template._render()
+            BaseLayer._rendered.clear()
+            BaseLayer._rendered[self._token] = im
+        return im
@@ -1,11 +1,25 @@
-from collections.abc import MutableSequence, Sequence
-from itertools import cycle
+from __future__ import annotations
+from collections.abc import MutableSequence, Sequence, Sized
+from itertools import count, cycle, islice, repeat, tee
 import logging
 from pathlib import Path
-from typing import Iterator, Self, Mapping, Callable, TypeVar
+from typing import TYPE_CHECKING, Iterable, Iterator, Self, Mapping, Callable, TypeVar
 import warnings
-from skit.card import Card, CardManipulation
-from skit._types import Real, LayoutDef, Color, FreeTypeFont
+from skit.card import BaseLayer, Card, CardManipulation, normalize_layoutdef
+from skit.render import TextCommand, RectangleCommand, ImageCommand
+from skit._types import Real, LayoutDef, Color, Resampling
+from skit._parallel import BackgroundWriter, map_ordered
+from skit._batch import BatchRenderer
+from skit.pdf import StreamingPdfWriter, VectorPdfWriter
+from skit.sheet import SheetLayout
+from skit.encode import Encoder, ImageFormat
+from skit._manifest import RenderManifest
+from skit.template import Template
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    from PIL import Image
+    from PIL.ImageFont import FreeTypeFont
 
 
 logger = logging.getLogger(__file__)
@@ -18,7 +32,30 @@ class Deck(MutableSequence, CardManipulation):
         if width: opts['width'] = width
         if height: opts['height'] = height
         self._cards: list[Card] = [Card(**opts) for _ in range(card_count)]
+
+        # one layout table shared by every card this deck created; a card
+        # copies it only if it's given a layout of its own through deck[i]
+        self._layouts: dict[str, LayoutDef] = {}
+        for card in self._cards:
+            card._layouts = self._layouts
+            card._layouts_shared = True
     
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping], template: Template) -> CardStream:
+        """
+        Make a card for each record using a `skit.template.Template`. Cards
+        are made as they're rendered and dropped right after, so memory use
+        stays the same however many records there are:
+
+        ```python
+        records = skit.template.read_records('cards.csv')
+        skit.Deck.from_records(records, template).render_pdf('deck.pdf', 300)
+        ```
+
+        `records` is read once, as rendering goes.
+        """
+        return CardStream(records, template)
+
     #region Container convenience
     def __add__(self, other: Self) -> Self:
         if not issubclass(type(other), Deck):
@@ -27,6 +64,25 @@ class Deck(MutableSequence, CardManipulation):
         d = Deck(0)
         d._cards = self._cards + other._cards
         return d
+
+    def scaled(self, factor: float) -> Deck:
+        """
+        A copy of this deck at `factor` times the size. One deck can make
+        both quick thumbnails and print-resolution output:
+
+        ```python
+        deck.scaled(0.25).render_png('thumb_{index}.png')
+        deck.render_pdf('print.pdf', resolution=300)
+        ```
+
+        See `Card.scaled()`.
+        """
+        layouts: dict[int, dict] = {}
+        commands: dict[int, object] = {}
+        d = Deck(0)
+        d._cards = [card._scaled(factor, layouts, commands) for card in self._cards]
+        d._layouts = layouts.get(id(self._layouts), d._layouts)
+        return d
     #endregion
 
     #region Card manipulation
@@ -35,50 +91,88 @@ class Deck(MutableSequence, CardManipulation):
         logger.debug(f"Deck.background({color})")
         for card in self._cards:
             card.background(color)
+
+    def encoder(self, encoder: Encoder):
+        """
+        Choose the file format and compression used by `render_png()` for
+        every card in this deck. See `skit.encode` for presets.
+        """
+        logger.debug(f"Deck.encoder({encoder})")
+        for card in self._cards:
+            card.encoder(encoder)
+
+    def resampling(self, resampling: Resampling):
+        """
+        Choose how carefully art is resized for every card in this deck.
+        `Resampling.FAST` is much quicker when large art is shrunk a lot,
+        which suits proofs; `Resampling.BEST` is the default.
+        """
+        logger.debug(f"Deck.resampling({resampling})")
+        for card in self._cards:
+            card.resampling(resampling)
     
     def layout(self, name: str, layoutdef: LayoutDef):
         "Add a layout to every card in this deck."
         logger.debug(f"Deck.layout({name}, ...)")
-        for card in self._cards:
-            card.layout(name, layoutdef)
+        self._set_layout(name, layoutdef)
     
     def layouts(self, names: Sequence[str], layoutdefs: Sequence[LayoutDef]):
         "Add multiple layouts to every card in this deck."
+        assert len(names) == len(layoutdefs), "mismatched names/layoutdefs arguments"
+
         logger.debug(f"Deck.layouts(sequence of layouts)")
-        for card in self._cards:
-            card.layouts(names, layoutdefs)
+        for name, layoutdef in zip(names, layoutdefs):
+            self._set_layout(name, layoutdef)
 
     def layouts_map(self, layouts: Mapping[str, LayoutDef]):
         "Add multiple layouts from a dictionary to every card in this deck."
         logger.debug(f"Deck.layouts_map(map of name->layouts)")
+        for name, layoutdef in layouts.items():
+            self._set_layout(name, layoutdef)
+
+    def _set_layout(self, name: str, layoutdef: LayoutDef):
+        layoutdef = normalize_layoutdef(layoutdef)
+        self._layouts[name] = layoutdef
         for card in self._cards:
-            card.layouts_map(layouts)
+            if card._layouts is not self._layouts:
+                card.layout(name, layoutdef)
 
     def text(self, text: str, layout: str, font: FreeTypeFont | None = None, color: Color | None = None):
         "Add a text string to every card in this deck."
+        assert type(text) is str
+
         logger.debug(f"Deck.text({text})")
-        for card in self._cards:
-            card.text(text, layout, font, color)
+        self._add_command(TextCommand(layout, text, font, color))
     
     def rectangle(self, layout: str, color: Color | None = None, thickness: Real | None = None):
         "Draw a rectangle on every card in this deck."
         logger.debug(f"Deck.rect({layout})")
-        for card in self._cards:
-            card.rectangle(layout, color, thickness)
+        self._add_command(RectangleCommand(layout, color, thickness, filled=False))
 
     def filled_rectangle(self, layout: str, color: Color):
         "Draw a filled rectangle on every card in this deck."
         logger.debug(f"Deck.filled_rect({layout})")
-        for card in self._cards:
-            card.filled_rectangle(layout, color)
+        self._add_command(RectangleCommand(layout, color, 1, filled=True))
 
     def image(self, image: Path, layout: str):
         "Draw an image on every card in this deck."
         logger.debug(f"Deck.image({image})")
+        self._add_command(ImageCommand(layout, image))
+
+    def _add_command(self, command):
+        # every card gets the very same (immutable) command object
         for card in self._cards:
-            card.image(image, layout)
+            card._add_command(command)
 
-    def render_png(self, filename: str):
+    def render_png(
+        self,
+        filename: str,
+        workers: int | None = None,
+        executor: Executor | None = None,
+        manifest: str | Path | None = None,
+        writers: int | None = None,
+        batch: int | None = None,
+    ):
         """
         Render every card in this deck as a PNG.
 
@@ -88,18 +182,89 @@ class Deck(MutableSequence, CardManipulation):
         ```python
         deck.render_png("card_{index}.png")
         ```
+
+        To use more than one CPU core, pass `workers` to render on a pool of
+        that many processes, or pass your own `executor`. Cards are numbered
+        the same way either way. On macOS and Windows, each worker process
+        starts by importing your script, so any script that uses `workers`
+        must keep its top-level code under a `__main__` guard. Otherwise
+        every worker runs the whole script again and fails:
+
+        ```python
+        def build():
+            deck = skit.Deck(...)
+            ...
+            return deck
+
+        if __name__ == '__main__':
+            build().render_png("card_{index}.png", workers=4)
+        ```
+
+        If you pass a `manifest` filename, Skit records a hash of each card
+        there and, on later renders, skips cards whose output file already
+        matches. Only changed cards get redrawn.
+
+        Pass `writers` to encode and write files on that many background
+        threads while the next cards are drawn. This helps most when the
+        output directory is slow, such as a network share. The call still
+        returns only once every file is written, and raises any error a
+        writer hit.
+
+        Pass `batch` to draw that many cards at a time using NumPy, which
+        must be installed. Each rectangle a card starts with is drawn on
+        every card in the batch that has it at once. That helps small cards
+        covered in lots of boxes; for full-size cards, drawing them one at a
+        time is usually just as quick, so time it on your own deck. Cards
+        look exactly the same either way.
         """
         logger.debug(f"Deck.render_png({filename})")
 
         if '{index}' not in filename:
             warnings.warn("'{index}' isn't in the filename, so images may overwrite one another")
 
-        for index, card in enumerate(self._cards):
-            card.render_png(filename.format_map({
-                'index': index,
-            }))
+        cards = self._cards
+        filenames = [filename.format_map({'index': index}) for index in range(len(self._cards))]
+        if manifest is not None:
+            manifest = RenderManifest(manifest)
+            digests = [card.content_hash() for card in cards]
+            stale = [
+                index for index, (name, digest) in enumerate(zip(filenames, digests))
+                if not manifest.is_current(name, digest)
+            ]
+            logger.debug(f"{len(cards) - len(stale)} of {len(cards)} cards are up to date")
+            cards = [cards[index] for index in stale]
+            filenames = [filenames[index] for index in stale]
 
-    def render_pdf(self, filename: str, resolution: int, single_file=True):
+        bases = [BaseLayer.common_to(cards)] * len(cards)
+        if writers:
+            with BackgroundWriter(writers) as background:
+                for card, name, im in zip(cards, filenames, _map_cards(
+                    _keep_image, cards, bases,
+                    count=len(cards), batch=batch, workers=workers, executor=executor,
+                )):
+                    background.submit(card._write_png, im, name)
+        else:
+            for _ in _map_cards(
+                _write_png, cards, bases, filenames,
+                count=len(cards), batch=batch, workers=workers, executor=executor,
+            ):
+                pass
+
+        if manifest is not None:
+            for name, index in zip(filenames, stale):
+                manifest.record(name, digests[index])
+            manifest.save()
+
+    def render_pdf(
+        self,
+        filename: str,
+        resolution: int,
+        single_file=True,
+        workers: int | None = None,
+        executor: Executor | None = None,
+        batch: int | None = None,
+        vector: bool = False,
+    ):
         """
         Render every card in this deck as a PDF.
 
@@ -111,38 +276,206 @@ class Deck(MutableSequence, CardManipulation):
         ```python
         deck.render_pdf("card_{index}.pdf", single_file=False)
         ```
+
+        `workers`, `executor`, and `batch` work the same as in
+        `render_png()`. Pages always come out in deck order.
+
+        If `vector` is True, cards are drawn as text, shapes, and images
+        instead of one bitmap per page (see `skit.pdf.VectorPdfWriter`).
+        Those files are much smaller and stay sharp when zoomed. There's no
+        rendering to share out, so `workers`, `executor`, and `batch` are
+        ignored.
         """
         logger.debug(f"Deck.render_pdf({filename})")
 
-        if single_file:
-            self._render_single_pdf(filename, resolution)
+        if vector:
+            _write_vector_pdf(self._cards, filename, resolution, single_file)
+        elif single_file:
+            self._render_single_pdf(filename, resolution, workers, executor, batch)
         else:
-            self._render_multiple_pdf(filename, resolution)
+            self._render_multiple_pdf(filename, resolution, workers, executor, batch)
 
-    def _render_single_pdf(self, filename: str, resolution: int):
-        pages = []
-        for card in self._cards:
-            pages.append(card._get_rgb_image_for_pdf(resolution))
-        
-        first = pages.pop(0)
-        first.save(
-            filename,
-            format='PDF',
-            resolution=resolution,
-            save_all=True,
-            append_images=pages,
-        )
+    def _render_single_pdf(self, filename: str, resolution: int, workers=None, executor=None, batch=None):
+        # pages are written as they arrive, so memory use doesn't grow
+        # with the size of the deck
+        bases = [BaseLayer.common_to(self._cards)] * len(self._cards)
+        with StreamingPdfWriter(filename, len(self._cards), resolution) as pdf:
+            for page, scale in _map_cards(
+                _pdf_page, self._cards, bases,
+                count=len(self._cards), batch=batch, workers=workers, executor=executor,
+            ):
+                pdf.add_page(page, resolution * scale)
 
-    def _render_multiple_pdf(self, filename: str, resolution: int):
+    def _render_multiple_pdf(self, filename: str, resolution: int, workers=None, executor=None, batch=None):
         if '{index}' not in filename:
             warnings.warn("'{index}' isn't in the filename, so images may overwrite one another")
 
-        for index, card in enumerate(self._cards):
-            card.render_pdf(
-                filename.format_map({'index': index}),  
-                resolution=resolution,
-                single_file=True,
-            )
+        filenames = [filename.format_map({'index': index}) for index in range(len(self._cards))]
+        bases = [BaseLayer.common_to(self._cards)] * len(self._cards)
+        for _ in _map_cards(
+            _write_pdf, self._cards, bases, filenames, [resolution] * len(self._cards),
+            count=len(self._cards), batch=batch, workers=workers, executor=executor,
+        ):
+            pass
+
+    def iter_images(
+        self,
+        indices: Iterable[int] | slice | None = None,
+        workers: int | None = None,
+        executor: Executor | None = None,
+        batch: int | None = None,
+    ) -> Iterator[Image.Image]:
+        """
+        Render cards one at a time and yield each as an RGBA PIL image,
+        without writing any files. Only the cards listed in `indices` are
+        rendered, or every card if it's `None`:
+
+        ```python
+        for im in deck.iter_images(range(10, 20)):
+            ...
+        ```
+
+        Cards are rendered as you ask for them. `workers`, `executor`, and
+        `batch` work the same as in `render_png()`, though then a few cards
+        get rendered ahead of time.
+        """
+        logger.debug(f"Deck.iter_images({indices})")
+
+        yield from self._iter_images(self._select(indices), workers, executor, batch)
+
+    def iter_encoded(
+        self,
+        format: Encoder | ImageFormat | None = None,
+        indices: Iterable[int] | slice | None = None,
+        workers: int | None = None,
+        executor: Executor | None = None,
+        batch: int | None = None,
+    ) -> Iterator[bytes]:
+        """
+        Like `iter_images()`, but yield each card encoded as file contents.
+        `format` may be an `skit.encode.Encoder`, or just an
+        `skit.encode.ImageFormat` for that format's default settings. If it's
+        `None`, each card uses the encoder chosen with `encoder()`.
+
+        ```python
+        for png in deck.iter_encoded(ImageFormat.PNG):
+            response.write(png)
+        ```
+        """
+        logger.debug(f"Deck.iter_encoded({format}, {indices})")
+
+        if isinstance(format, ImageFormat):
+            format = Encoder(format=format)
+        # `indices` may be a one-shot iterator, so it's only read once
+        cards = self._select(indices)
+        for card, im in zip(cards, self._iter_images(cards, workers, executor, batch)):
+            yield (format or card._encoder).encode(im)
+
+    def _iter_images(self, cards: list[Card], workers=None, executor=None, batch=None) -> Iterator[Image.Image]:
+        bases = [BaseLayer.common_to(cards)] * len(cards)
+        yield from _map_cards(
+            _keep_image, cards, bases,
+            count=len(cards), batch=batch, workers=workers, executor=executor,
+        )
+
+    def _select(self, indices: Iterable[int] | slice | None) -> list[Card]:
+        if indices is None:
+            return self._cards
+        if isinstance(indices, slice):
+            return self._cards[indices]
+        return [self._cards[index] for index in indices]
+
+    def render_sheets(
+        self,
+        filename: str,
+        paper: str | tuple[float, float] = 'letter',
+        dpi: int = 300,
+        margin: int | None = None,
+        gutter: int = 0,
+        bleed: int = 0,
+        cut_marks: bool = True,
+        workers: int | None = None,
+        executor: Executor | None = None,
+        batch: int | None = None,
+    ):
+        """
+        Render the deck onto print-and-play sheets, as many cards to a sheet
+        as will fit.
+
+        `paper` is a name from `skit.sheet.PAPER_SIZES` or a (width, height)
+        in inches, and `dpi` is the resolution the cards were designed at.
+        `margin` (a quarter inch by default), `gutter` (space between cards),
+        and `bleed` (how much of each card lies outside its cut line) are in
+        pixels. Cut marks are drawn in the margins, lined up with the cuts.
+        For a deck from `scaled()`, `dpi` and the sizes in pixels are still
+        those of the original design.
+
+        If `filename` ends in `.pdf`, all sheets go in one PDF. Otherwise,
+        each sheet is a PNG, and you may use `{index}` in the filename:
+
+        ```python
+        deck.render_sheets("sheet_{index}.png", paper='a4', gutter=12)
+        ```
+
+        Cards are drawn straight onto the sheet, with no intermediate files.
+        `workers`, `executor`, and `batch` work the same as in `render_png()`.
+        """
+        logger.debug(f"Deck.render_sheets({filename})")
+
+        as_pdf = filename.lower().endswith('.pdf')
+        if not as_pdf and '{index}' not in filename:
+            warnings.warn("'{index}' isn't in the filename, so sheets may overwrite one another")
+        if not self._cards:
+            # like render_png(), an empty deck makes no files, but a PDF
+            # can't be empty
+            if as_pdf:
+                raise ValueError("a PDF needs at least one page")
+            return
+
+        # a scaled deck goes on sheets scaled to match, so the cards still
+        # print at their designed size
+        scale = self._cards[0]._scale
+        if margin is None:
+            margin = dpi // 4
+        dpi = dpi * scale
+        layout = SheetLayout.fit(
+            paper, dpi,
+            card_width=max(card._width for card in self._cards),
+            card_height=max(card._height for card in self._cards),
+            margin=round(margin * scale),
+            gutter=round(gutter * scale),
+            bleed=round(bleed * scale),
+        )
+        sheet_count = layout.sheet_count(len(self._cards))
+        logger.debug(f"{layout.per_sheet} cards per sheet, {sheet_count} sheets")
+
+        def sheets():
+            bases = [BaseLayer.common_to(self._cards)] * len(self._cards)
+            sheet = None
+            for index, im in enumerate(_map_cards(
+                _keep_image, self._cards, bases,
+                count=len(self._cards), batch=batch, workers=workers, executor=executor,
+            )):
+                slot = index % layout.per_sheet
+                if slot == 0:
+                    if sheet is not None:
+                        yield sheet
+                    sheet = layout.new_sheet(cut_marks)
+                x, y = layout.position(slot)
+                # center cards that are smaller than the largest one
+                x += (layout.card_width - im.width) // 2
+                y += (layout.card_height - im.height) // 2
+                sheet.paste(im, (x, y), im)
+            if sheet is not None:
+                yield sheet
+
+        if as_pdf:
+            with StreamingPdfWriter(filename, sheet_count, dpi) as pdf:
+                for sheet in sheets():
+                    pdf.add_page(sheet)
+        else:
+            for index, sheet in enumerate(sheets()):
+                sheet.save(filename.format_map({'index': index}), format='PNG', dpi=(dpi, dpi))
     #endregion
 
     #region Card sequence manipulation
@@ -195,8 +528,14 @@ class Deck(MutableSequence, CardManipulation):
         """
         logger.debug(f"Deck.texts(sequence of strings)")
         args = self._make_seqs(texts=texts, layouts=layouts, fonts=fonts, colors=colors)
+        commands = {}
         for card, text, layout, font, color in zip(self._cards, args['texts'], args['layouts'], args['fonts'], args['colors']):
-            card.text(text, layout, font, color)
+            assert type(text) is str
+            # cards with the same text (say, eight pawns) share one command
+            key = (layout, text, font, color)
+            if key not in commands:
+                commands[key] = TextCommand(*key)
+            card._add_command(commands[key])
 
     def images(
         self,
@@ -209,8 +548,12 @@ class Deck(MutableSequence, CardManipulation):
         """
         logger.debug(f"Deck.images(sequence of images)")
         args = self._make_seqs(images=images, layouts=layouts)
+        commands = {}
         for card, image, layout in zip(self._cards, args['images'], args['layouts']):
-            card.image(image, layout)
+            key = (layout, image)
+            if key not in commands:
+                commands[key] = ImageCommand(*key)
+            card._add_command(commands[key])
     
     def _make_seqs(self, **kwargs):
         args = {}
@@ -226,6 +569,7 @@ class Deck(MutableSequence, CardManipulation):
         return self._cards[index]
     
     def __delitem__(self, index) -> None:
+        self._detach(self._cards[index])
         del self._cards[index]
     
     def __iter__(self) -> Iterator[Card]:
@@ -237,13 +581,234 @@ class Deck(MutableSequence, CardManipulation):
     def __setitem__(self, index, value: Card) -> None:
         assert issubclass(type(value), Card)
         
+        self._detach(self._cards[index])
         self._cards[index] = value
     
     def insert(self, index, value: Card) -> None:
         assert issubclass(type(value), Card)
 
         self._cards.insert(index, value)
+
+    def _detach(self, cards: Card | list[Card]):
+        # a card leaving the deck gets its own copy of the shared layouts,
+        # so later Deck.layout() calls don't reach it
+        for card in cards if isinstance(cards, list) else [cards]:
+            if card._layouts is self._layouts:
+                card._own_layouts()
     #endregion
 
     def __str__(self):
         return ", ".join([f"{idx}: {c}" for idx, c in enumerate(self._cards)])
+
+
+class CardStream:
+    """
+    Cards made from records by a `skit.template.Template`, one at a time.
+    Get one from `Deck.from_records()`.
+
+    The records are read as cards are rendered, so a stream can be rendered
+    only once unless `records` is a list or some other re-readable collection.
+    """
+    def __init__(self, records: Iterable[Mapping], template: Template):
+        self._records = records
+        self._template = template
+        self._scale = 1.0
+
+    def __iter__(self) -> Iterator[Card]:
+        return self._cards()
+
+    def scaled(self, factor: float) -> CardStream:
+        "These cards at `factor` times the size. See `Card.scaled()`."
+        stream = CardStream(self._records, self._template)
+        stream._scale = self._scale * factor
+        return stream
+
+    def _cards(self) -> Iterator[Card]:
+        cards = self._template.cards(self._records)
+        if self._scale == 1:
+            return cards
+        # streamed cards come and go, so nothing is kept between them
+        return (card._scaled(self._scale, {}, {}) for card in cards)
+
+    def render_png(
+        self,
+        filename: str,
+        workers: int | None = None,
+        executor: Executor | None = None,
+        writers: int | None = None,
+        batch: int | None = None,
+    ):
+        "Render every card as a PNG. Works like `Deck.render_png()`."
+        logger.debug(f"CardStream.render_png({filename})")
+
+        if '{index}' not in filename:
+            warnings.warn("'{index}' isn't in the filename, so images may overwrite one another")
+
+        filenames = (filename.format_map({'index': index}) for index in count())
+        if writers:
+            cards, rendering = tee(self._cards())
+            with BackgroundWriter(writers) as background:
+                for card, name, im in zip(cards, filenames, _map_cards(
+                    _keep_image, *self._with_bases(rendering),
+                    count=self._count(), batch=batch, workers=workers, executor=executor,
+                )):
+                    background.submit(card._write_png, im, name)
+        else:
+            cards, bases = self._with_bases(self._cards())
+            for _ in _map_cards(
+                _write_png, cards, bases, filenames,
+                count=self._count(), batch=batch, workers=workers, executor=executor,
+            ):
+                pass
+
+    def render_pdf(
+        self,
+        filename: str,
+        resolution: int,
+        single_file=True,
+        workers: int | None = None,
+        executor: Executor | None = None,
+        batch: int | None = None,
+        vector: bool = False,
+    ):
+        "Render every card as a PDF. Works like `Deck.render_pdf()`."
+        logger.debug(f"CardStream.render_pdf({filename})")
+
+        if vector:
+            _write_vector_pdf(self._cards(), filename, resolution, single_file)
+            return
+        cards, bases = self._with_bases(self._cards())
+        if single_file:
+            # the page count isn't known until the records run out
+            with StreamingPdfWriter(filename, None, resolution) as pdf:
+                for page, scale in _map_cards(
+                    _pdf_page, cards, bases,
+                    count=self._count(), batch=batch, workers=workers, executor=executor,
+                ):
+                    pdf.add_page(page, resolution * scale)
+        else:
+            if '{index}' not in filename:
+                warnings.warn("'{index}' isn't in the filename, so images may overwrite one another")
+            filenames = (filename.format_map({'index': index}) for index in count())
+            for _ in _map_cards(
+                _write_pdf, cards, bases, filenames, repeat(resolution),
+                count=self._count(), batch=batch, workers=workers, executor=executor,
+            ):
+                pass
+
+    def iter_images(
+        self,
+        workers: int | None = None,
+        executor: Executor | None = None,
+        batch: int | None = None,
+    ) -> Iterator[Image.Image]:
+        "Render cards one at a time and yield each as an RGBA PIL image."
+        logger.debug(f"CardStream.iter_images()")
+
+        yield from _map_cards(
+            _keep_image, *self._with_bases(self._cards()),
+            count=self._count(), batch=batch, workers=workers, executor=executor,
+        )
+
+    def _with_bases(self, cards: Iterator[Card]) -> tuple[Iterator[Card], Iterator[BaseLayer | None]]:
+        # a template's cards all start with its fixed drawing, unless an
+        # each() step changed something like the background
+        base = self._template.base_layer()
+        if base is not None and self._scale != 1:
+            base = base.scaled(self._scale)
+        cards, checking = tee(cards)
+        return cards, (base if base is not None and base.fits(card) else None for card in checking)
+
+    def _count(self) -> int:
+        # only used to size chunks of work for worker processes; with no
+        # length to go on, assume there are plenty of records
+        return len(self._records) if isinstance(self._records, Sized) else 1 << 20
+
+
+def _map_cards(
+    finish: Callable,
+    cards: Iterable[Card],
+    bases: Iterable[BaseLayer | None],
+    *args: Iterable,
+    count: int,
+    batch: int | None = None,
+    workers: int | None = None,
+    executor: Executor | None = None,
+) -> Iterator:
+    """
+    Render each card onto its base, then call `finish(card, image, *args)`
+    with the matching items of `args`. Yields what `finish` returns, in
+    order. With a `batch` size, that many cards at a time are drawn together
+    by a `BatchRenderer`.
+    """
+    if not batch:
+        yield from map_ordered(
+            _render_one, repeat(finish), cards, bases, *args,
+            count=count, workers=workers, executor=executor,
+        )
+        return
+
+    # make sure NumPy is there before any work is handed out
+    renderer = BatchRenderer()
+    rows = zip(cards, bases, *args)
+    batches = iter(lambda: list(islice(rows, batch)), [])
+    if executor is None and not (workers and workers > 1):
+        # one card at a time, so each image can go before the next is made
+        for batch_rows in batches:
+            yield from _finish_batch(renderer, finish, batch_rows)
+        return
+    for finished in map_ordered(
+        _render_batch, repeat(finish), batches,
+        count=-(-count // batch), workers=workers, executor=executor,
+    ):
+        yield from finished
+
+
+# Worker entry points. These live at module level so a process pool can
+# pickle them.
+def _render_one(finish: Callable, card: Card, base: BaseLayer | None, *args):
+    return finish(card, card._render(base), *args)
+
+
+def _render_batch(finish: Callable, rows: list[tuple]):
+    return list(_finish_batch(BatchRenderer(), finish, rows))
+
+
+def _finish_batch(renderer: BatchRenderer, finish: Callable, rows: list[tuple]) -> Iterator:
+    cards, bases, *args = zip(*rows)
+    images = renderer.render(cards, bases)
+    for card, im, *extra in zip(cards, images, *args):
+        yield finish(card, im, *extra)
+
+
+# What to do with each rendered card
+def _keep_image(card: Card, im: Image.Image):
+    return im
+
+
+def _write_png(card: Card, im: Image.Image, filename: str):
+    logger.debug(f"rendering {filename}")
+    card._write_png(im, filename)
+
+
+def _write_pdf(card: Card, im: Image.Image, filename: str, resolution: int):
+    logger.debug(f"rendering {filename}")
+    card._write_pdf(card._flatten_for_pdf(im), filename, resolution)
+
+
+def _pdf_page(card: Card, im: Image.Image):
+    # a scaled card's page has more or fewer pixels to the inch
+    return card._flatten_for_pdf(im), card._scale
+
+
+def _write_vector_pdf(cards: Iterable[Card], filename: str, resolution: int, single_file: bool):
+    if single_file:
+        with VectorPdfWriter(filename, resolution) as pdf:
+            for card in cards:
+                pdf.add_card(card)
+        return
+
+    if '{index}' not in filename:
+        warnings.warn("'{index}' isn't in the filename, so images may overwrite one another")
+    for index, card in enumerate(cards):
+        card._write_vector_pdf(filename.format_map({'index': index}), resolution)
@@ -0,0 +1,122 @@
+"""
+Choosing how rendered cards are encoded.
+
+Encoding is often the slowest part of rendering a simple card, and the right
+trade-off depends on what the files are for. Quick preview builds want
+speed; final print builds want small files.
+
+```python
+from skit.encode import Encoder, ImageFormat, DRAFT, SMALLEST
+
+deck.encoder(DRAFT)                                       # fast previews
+deck.encoder(SMALLEST)                                    # final build
+deck.encoder(Encoder(format=ImageFormat.WEBP))            # lossless WebP
+```
+"""
+from __future__ import annotations
+from enum import Enum
+import io
+import logging
+from typing import BinaryIO, NamedTuple
+from skit._lazy import lazy_import
+
+Image = lazy_import('PIL.Image')
+ImageChops = lazy_import('PIL.ImageChops')
+
+
+logger = logging.getLogger(__file__)
+
+
+class ImageFormat(Enum):
+    "File formats cards can be written in."
+    PNG = 'png'
+    """Lossless PNG."""
+    WEBP = 'webp'
+    """Lossless WebP, usually smaller than PNG."""
+    TIFF = 'tiff'
+    """Uncompressed TIFF, which is very fast to write."""
+    RAW = 'raw'
+    """Bare RGBA pixels with no header, which is the fastest to write."""
+
+
+class Encoder(NamedTuple):
+    "How a rendered card is turned into bytes."
+    format: ImageFormat = ImageFormat.PNG
+    """The file format to write."""
+    compress_level: int | None = None
+    """
+    Compression effort from 0 (fastest) to 9 (smallest). `None` means the
+    format's default, which for PNG is 6. Ignored by TIFF and raw output.
+    """
+    optimize: bool = False
+    """Spend extra time searching for the smallest PNG encoding."""
+    colors: int | None = None
+    """
+    If set, cards using at most this many distinct colors are written as
+    palette images, which is lossless and much smaller for flat-color cards.
+    Cards with more colors are left alone. PNG only.
+    """
+
+    def save(self, im: Image.Image, fp: str | BinaryIO):
+        "Encode `im` and write it to `fp`, a filename or file object."
+        match self.format:
+            case ImageFormat.PNG:
+                options = {'optimize': self.optimize}
+                if self.compress_level is not None:
+                    options['compress_level'] = self.compress_level
+                self._quantize(im).save(fp, format='PNG', **options)
+            case ImageFormat.WEBP:
+                options = {'lossless': True}
+                if self.compress_level is not None:
+                    # WebP effort runs 0-6 rather than 0-9
+                    options['method'] = round(self.compress_level * 6 / 9)
+                im.save(fp, format='WEBP', **options)
+            case ImageFormat.TIFF:
+                im.save(fp, format='TIFF', compression=None)
+            case ImageFormat.RAW:
+                if isinstance(fp, (str, bytes)) or hasattr(fp, '__fspath__'):
+                    with open(fp, 'wb') as raw_out:
+                        raw_out.write(im.tobytes())
+                else:
+                    fp.write(im.tobytes())
+            case _:
+                raise ValueError(f"format '{self.format}' unrecognized")
+
+    def encode(self, im: Image.Image) -> bytes:
+        "Encode `im` and return the bytes."
+        buffer = io.BytesIO()
+        self.save(im, buffer)
+        return buffer.getvalue()
+
+    def _quantize(self, im: Image.Image) -> Image.Image:
+        if self.colors is None:
+            return im
+        colors = im.getcolors(self.colors)
+        if colors is None:
+            return im
+
+        palette = im.quantize(len(colors), method=Image.Quantize.FASTOCTREE)
+        # only keep the palette image if no pixel changed
+        if ImageChops.difference(palette.convert(im.mode), im).getbbox() is not None:
+            logger.debug("palette conversion would change pixels, keeping full color")
+            return im
+        return palette
+
+
+DEFAULT = Encoder()
+"""PNG with Pillow's default settings."""
+
+DRAFT = Encoder(compress_level=1)
+"""Fast, lightly compressed PNG for previews."""
+
+SMALLEST = Encoder(compress_level=9, optimize=True, colors=256)
+"""The smallest PNG Skit can make, at the cost of speed."""
+
+
+__all__ = [
+    'ImageFormat',
+    'Encoder',
+    'DEFAULT',
+    'DRAFT',
+    'SMALLEST',
+]
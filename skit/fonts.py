@@ -0,0 +1,274 @@
+"""
+Loading fonts once and finding them by name.
+
+`skit.load_font()` keeps every font it loads, so asking for the same font at
+the same size again hands back the very same object without touching the
+file. Fonts can be named by path, by file name (`'DejaVuSans'`), or by
+family and style (`'DejaVu Sans'`, `'DejaVu Sans Bold'`):
+
+```python
+title = skit.load_font('Helvetica', 48)
+rules = skit.load_font('Roboto Flex', 30, variation='Condensed')
+skit.fonts.find_font('Helvetica')   # '/System/Library/Fonts/Helvetica.ttc'
+```
+
+Names are looked up in an index of the system font directories (the same
+ones Pillow searches). It's built the first time a name is needed and saved
+under `skit.cache.cache_dir()`, then rebuilt whenever a font directory
+changes.
+
+Fonts from `load_font()` are shared, so don't change them. Ask for a
+`variation` rather than calling `set_variation_by_name()` yourself.
+"""
+from __future__ import annotations
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from typing import TYPE_CHECKING, Any, BinaryIO, NamedTuple
+from skit._lazy import lazy_import
+from skit.cache import cache_dir
+
+if TYPE_CHECKING:
+    from PIL.ImageFont import FreeTypeFont
+
+ImageFont = lazy_import('PIL.ImageFont')
+
+
+logger = logging.getLogger(__file__)
+
+_INDEX_VERSION = 1
+_FONT_EXTENSIONS = {'.ttf', '.ttc', '.otf', '.otc', '.woff', '.woff2', '.pfb', '.dfont'}
+_REGULAR_STYLES = {'regular', 'book', 'roman', 'normal', 'medium'}
+
+
+class FontRef(NamedTuple):
+    "Everything needed to load a font again, such as in a worker process."
+    path: str
+    size: float
+    index: int
+    encoding: str
+    layout_engine: int | None
+    variation: str | bytes | None = None
+
+
+def load_font(
+    font: str | bytes | os.PathLike | BinaryIO,
+    size: float = 10,
+    index: int = 0,
+    encoding: str = '',
+    layout_engine: int | None = None,
+    variation: str | bytes | None = None,
+) -> FreeTypeFont:
+    """
+    Load a TrueType or OpenType font, or return the one already loaded with
+    the same arguments.
+
+    - `font`: a path, a font file name, a family name with an optional
+    style, or a file-like object. Fonts from file-like objects aren't kept.
+    - `size`: the size, in pixels.
+    - `variation`: for variable fonts, the name of a named instance such as
+    `'Bold'`.
+
+    `index`, `encoding`, and `layout_engine` are passed to
+    [PIL.ImageFont.truetype][truetypedocs].
+
+    [truetypedocs]: https://pillow.readthedocs.io/en/stable/reference/ImageFont.html#PIL.ImageFont.truetype
+    """
+    if not isinstance(font, (str, bytes, os.PathLike)):
+        loaded = ImageFont.truetype(font, size, index, encoding, layout_engine)
+        if variation is not None:
+            loaded.set_variation_by_name(variation)
+        return loaded
+
+    path = find_font(font)
+    if path is None:
+        raise OSError(f"cannot find font '{os.fsdecode(font)}'")
+    return _open(FontRef(path, size, index, encoding, layout_engine, variation))
+
+
+def find_font(name: str | bytes | os.PathLike) -> str | None:
+    """
+    The full path of the font file `name` refers to, or `None` if it can't
+    be found. Matching ignores case, spaces, dashes, and underscores.
+    """
+    name = os.fsdecode(name)
+    path = _found.get(name)
+    if path is None:
+        if os.path.isfile(name):
+            path = os.path.abspath(name)
+        else:
+            path = _index().get(_key(os.path.basename(name)))
+        if path is not None:
+            # misses aren't kept, so a font installed later is still found
+            _found[name] = path
+    return path
+
+
+def pack_font(font: Any) -> Any:
+    "Swap a file-backed `FreeTypeFont` for a `FontRef`; leave anything else alone."
+    if isinstance(font, ImageFont.FreeTypeFont):
+        ref = _refs.get(id(font))
+        if ref is not None:
+            return ref
+        if isinstance(font.path, (str, bytes, os.PathLike)):
+            return FontRef(
+                path=os.fsdecode(font.path),
+                size=font.size,
+                index=font.index,
+                encoding=font.encoding,
+                layout_engine=font.layout_engine,
+            )
+    return font
+
+
+def unpack_font(font: Any) -> Any:
+    "Turn a `FontRef` back into a `FreeTypeFont`; leave anything else alone."
+    if isinstance(font, FontRef):
+        return _open(font)
+    return font
+
+
+# every font _open() returns is kept alive in _loaded, or in _retired once
+# it's been reloaded, so its id() can safely stand in for it
+_refs: dict[int, FontRef] = {}
+_loaded: dict[FontRef, FreeTypeFont] = {}
+_retired: list[FreeTypeFont] = []
+_found: dict[str, str] = {}
+_load_lock = threading.Lock()
+
+
+def _open(ref: FontRef) -> FreeTypeFont:
+    font = _loaded.get(ref)
+    if font is None:
+        logger.debug(f"loading font {ref.path} at {ref.size}")
+        font = ImageFont.truetype(ref.path, ref.size, ref.index, ref.encoding, ref.layout_engine)
+        if ref.variation is not None:
+            font.set_variation_by_name(ref.variation)
+        with _load_lock:
+            # if another thread got there first, everyone shares its copy
+            font = _loaded.setdefault(ref, font)
+            _refs[id(font)] = ref
+    return font
+
+
+def _forget(path: str):
+    "Make the next load of any font from `path` read the file again."
+    with _load_lock:
+        for ref in [ref for ref in _loaded if ref.path == path]:
+            logger.debug(f"forgetting font {ref.path} at {ref.size}")
+            _retired.append(_loaded.pop(ref))
+
+
+#region Font index
+_fonts: dict[str, str] | None = None
+_index_lock = threading.Lock()
+
+
+def _index() -> dict[str, str]:
+    global _fonts
+    with _index_lock:
+        if _fonts is None:
+            _fonts = _load_index()
+            if _fonts is None:
+                _fonts = _build_index()
+        return _fonts
+
+
+def _key(name: str) -> str:
+    return re.sub(r'[\s_-]+', '', name).lower()
+
+
+def _font_dirs() -> list[str]:
+    # the directories Pillow searches, in the same order
+    if sys.platform == 'win32':
+        dirs = []
+        if windir := os.environ.get('WINDIR'):
+            dirs.append(os.path.join(windir, 'fonts'))
+        if local := os.environ.get('LOCALAPPDATA'):
+            dirs.append(os.path.join(local, 'Microsoft', 'Windows', 'Fonts'))
+        return dirs
+    if sys.platform == 'darwin':
+        return ['/Library/Fonts', '/System/Library/Fonts', os.path.expanduser('~/Library/Fonts')]
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    data_dirs = os.environ.get('XDG_DATA_DIRS') or '/usr/local/share:/usr/share'
+    return [os.path.join(data_dir, 'fonts') for data_dir in [data_home, *data_dirs.split(':')]]
+
+
+def _mtime(directory: str) -> int | None:
+    try:
+        return os.stat(directory).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _load_index() -> dict[str, str] | None:
+    try:
+        with open(cache_dir() / 'fonts.json') as index_in:
+            data = json.load(index_in)
+    except (OSError, ValueError):
+        return None
+
+    # adding or removing a font changes its directory's modification time
+    if data.get('version') != _INDEX_VERSION or data.get('roots') != _font_dirs():
+        return None
+    if any(_mtime(directory) != mtime for directory, mtime in data['dirs'].items()):
+        logger.debug("font directories changed, rescanning")
+        return None
+    return data['fonts']
+
+
+def _build_index() -> dict[str, str]:
+    logger.debug("scanning font directories")
+    roots = _font_dirs()
+    dirs: dict[str, int | None] = {}
+    fonts: dict[str, str] = {}
+    families: dict[str, str] = {}
+    for root in roots:
+        dirs[root] = _mtime(root)
+        for walkroot, walkdirs, walkfiles in os.walk(root):
+            walkdirs.sort()
+            dirs[walkroot] = _mtime(walkroot)
+            for filename in sorted(walkfiles):
+                stem, ext = os.path.splitext(filename)
+                if ext.lower() not in _FONT_EXTENSIONS:
+                    continue
+                path = os.path.join(walkroot, filename)
+                fonts.setdefault(_key(filename), path)
+                # like Pillow, a bare file name prefers the .ttf
+                if _key(stem) not in fonts or ext.lower() == '.ttf' and not fonts[_key(stem)].lower().endswith('.ttf'):
+                    fonts[_key(stem)] = path
+
+                try:
+                    family, style = ImageFont.truetype(path, 10).getname()
+                except (OSError, ValueError):
+                    continue
+                if family:
+                    fonts.setdefault(_key(f"{family} {style or ''}"), path)
+                    if (style or '').lower() in _REGULAR_STYLES:
+                        fonts.setdefault(_key(family), path)
+                    else:
+                        families.setdefault(_key(family), path)
+    # a family name alone means its regular style, or failing that any style
+    for key, path in families.items():
+        fonts.setdefault(key, path)
+
+    try:
+        cache_dir().mkdir(parents=True, exist_ok=True)
+        temp = cache_dir() / 'fonts.json.tmp'
+        with open(temp, 'w') as index_out:
+            json.dump({'version': _INDEX_VERSION, 'roots': roots, 'dirs': dirs, 'fonts': fonts}, index_out)
+        os.replace(temp, cache_dir() / 'fonts.json')
+    except OSError as e:
+        logger.debug(f"couldn't save the font index: {e}")
+    return fonts
+#endregion
+
+
+__all__ = [
+    'FontRef',
+    'load_font',
+    'find_font',
+]
@@ -0,0 +1,612 @@
+"""
+Writing PDFs one page at a time.
+
+Pillow's PDF writer wants every page in memory before it starts. For large
+decks that's gigabytes of bitmaps, so Skit writes pages as they're rendered
+instead, using Pillow's own PDF object writer and the same page layout
+Pillow would produce.
+
+`VectorPdfWriter` skips the bitmaps altogether. It writes each card's
+drawing commands as PDF drawing: text as real text in an embedded font,
+rectangles as shapes, and art as images. Every font and every piece of art
+goes in the file once, however many pages use it.
+"""
+from __future__ import annotations
+import hashlib
+import io
+import logging
+import os
+import time
+import zlib
+from typing import TYPE_CHECKING
+from skit._lazy import lazy_import
+from skit._sfnt import Sfnt
+from skit._textfit import metrics
+from skit._types import Color
+from skit.fonts import FontRef, pack_font
+from skit.render import (
+    SingleImageRenderer, DrawText, DrawTextBlock, DrawRectangle, DrawImage, art_position, _art_key,
+)
+from skit import trace
+
+if TYPE_CHECKING:
+    from PIL.ImageFont import FreeTypeFont
+    from skit.card import Card
+
+Image = lazy_import('PIL.Image')
+ImageColor = lazy_import('PIL.ImageColor')
+ImageDraw = lazy_import('PIL.ImageDraw')
+ImageFont = lazy_import('PIL.ImageFont')
+PdfParser = lazy_import('PIL.PdfParser')
+
+
+logger = logging.getLogger(__file__)
+
+
+class StreamingPdfWriter:
+    """
+    Write a PDF of `page_count` pages, encoding and writing each page as soon
+    as it's added so only one page is held in memory at a time. If the page
+    count isn't known ahead of time, pass `None` and the page list is
+    written at the end instead.
+
+    ```python
+    with StreamingPdfWriter('deck.pdf', len(images), resolution=300) as pdf:
+        for im in images:
+            pdf.add_page(im)
+    ```
+    """
+    def __init__(self, filename: str, page_count: int | None, resolution: float = 72.0):
+        assert page_count is None or page_count > 0, "a PDF needs at least one page"
+
+        self._resolution = resolution
+        self._page_count = page_count
+        self._pages_written = 0
+
+        self._pdf = _open(filename)
+        self._pdf.write_header()
+        self._pdf.write_comment("created by Pillow PDF driver")
+
+        self._image_refs = []
+        self._page_refs = []
+        self._contents_refs = []
+        if page_count is None:
+            # pages point at their parent, so its number is needed up front
+            self._pdf.pages_ref = self._pdf.next_object_id(0)
+        else:
+            # the catalog lists every page up front, so reserve all the object
+            # numbers now and fill them in as pages arrive
+            for _ in range(page_count):
+                self._reserve_page()
+            self._pdf.write_catalog()
+
+    def _reserve_page(self):
+        self._image_refs.append(self._pdf.next_object_id(0))
+        self._page_refs.append(self._pdf.next_object_id(0))
+        self._contents_refs.append(self._pdf.next_object_id(0))
+        self._pdf.pages.append(self._page_refs[-1])
+
+    def add_page(self, im: Image.Image, resolution: float | None = None):
+        """
+        Encode `im`, an RGB image, and write it as the next page. Pass
+        `resolution` if this page's differs from the rest of the PDF's.
+        """
+        assert im.mode == 'RGB', "PDF pages must be RGB"
+        if self._page_count is None:
+            self._reserve_page()
+        elif self._pages_written >= self._page_count:
+            raise ValueError(f"this PDF was opened for {self._page_count} pages")
+
+        logger.debug(f"writing page {self._pages_written}")
+        index = self._pages_written
+
+        op = io.BytesIO()
+        with trace.span('pdf page', 'encode', page=index):
+            im.save(op, format='JPEG')
+        self._pdf.write_obj(
+            self._image_refs[index],
+            stream=op.getvalue(),
+            Type=PdfParser.PdfName('XObject'),
+            Subtype=PdfParser.PdfName('Image'),
+            Width=im.width,
+            Height=im.height,
+            Filter=PdfParser.PdfName('DCTDecode'),
+            BitsPerComponent=8,
+            ColorSpace=PdfParser.PdfName('DeviceRGB'),
+        )
+
+        resolution = resolution or self._resolution
+        width = im.width * 72.0 / resolution
+        height = im.height * 72.0 / resolution
+        self._pdf.write_page(
+            self._page_refs[index],
+            Resources=PdfParser.PdfDict(
+                ProcSet=[PdfParser.PdfName('PDF'), PdfParser.PdfName('ImageC')],
+                XObject=PdfParser.PdfDict(image=self._image_refs[index]),
+            ),
+            MediaBox=[0, 0, width, height],
+            Contents=self._contents_refs[index],
+        )
+        self._pdf.write_obj(
+            self._contents_refs[index],
+            stream=b"q %f 0 0 %f 0 0 cm /image Do Q\n" % (width, height),
+        )
+
+        self._pages_written += 1
+
+    def close(self):
+        "Finish the PDF. Every page must have been added by now."
+        if self._page_count is None:
+            if self._pages_written == 0:
+                self._pdf.close()
+                raise ValueError("a PDF needs at least one page")
+            self._write_page_list()
+        elif self._pages_written != self._page_count:
+            self._pdf.close()
+            raise ValueError(f"expected {self._page_count} pages but got {self._pages_written}")
+
+        self._pdf.write_xref_and_trailer()
+        self._pdf.f.flush()
+        self._pdf.close()
+
+    def _write_page_list(self):
+        _write_page_list(self._pdf)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # don't mask the original error with a page-count complaint
+            self._pdf.close()
+
+
+class VectorPdfWriter:
+    """
+    Write cards to a PDF as vector drawing, one page per card:
+
+    ```python
+    with VectorPdfWriter('deck.pdf', resolution=300) as pdf:
+        for card in deck:
+            pdf.add_card(card)
+    ```
+
+    Card coordinates are pixels at `resolution` dots per inch, just as for
+    bitmap PDFs, but text and rectangles stay sharp at any zoom. Fonts are
+    embedded with only the characters the deck uses. Art is embedded at the
+    size it's drawn on the card, once per file and size. Text in a font that
+    can't be embedded (a bitmap font, or a font with a variation picked) is
+    drawn as an image instead.
+
+    Text appears in the same places as on a bitmap, but isn't shaped, so
+    scripts that need ligatures or reordering may not look right.
+    """
+    def __init__(self, filename: str, resolution: float = 72.0):
+        self._resolution = resolution
+        self._pages_written = 0
+        self._fonts: dict[object, _EmbeddedFont | None] = {}
+        self._images: dict[object, str] = {}
+        self._image_refs: dict[str, object] = {}
+        self._image_boxes: dict[str, tuple[int, int, int, int]] = {}
+
+        self._pdf = _open(filename)
+        # CFF fonts need PDF 1.6; everything else is 1.4
+        self._pdf.f.write(b"%PDF-1.6\n%\xe2\xe3\xcf\xd3\n")
+        # pages and their shared resources are written before the fonts
+        # are, since a font can't be cut down until every page is known
+        self._pdf.pages_ref = self._pdf.next_object_id(0)
+        self._resources_ref = self._pdf.next_object_id(0)
+
+    def add_card(self, card: Card):
+        "Draw `card` as the next page."
+        logger.debug(f"writing page {self._pages_written}")
+        renderer = SingleImageRenderer(card._layouts, card._resampling)
+        # a scaled card has more or fewer pixels to the inch
+        scale = 72.0 / (self._resolution * card._scale)
+        with trace.span('pdf page', 'encode', page=self._pages_written):
+            content = [
+                b"q %s 0 0 %s 0 %s cm" % (_num(scale, 6), _num(-scale, 6), _num(card._height * scale)),
+                # the flip above puts (0, 0) at the top left, like the bitmap
+                b"%s rg 0 0 %d %d re f" % (_rgb(card._background), card._width, card._height),
+            ]
+            for op in renderer.compile(card._commands):
+                match op:
+                    case DrawText():
+                        content += self._text(card, op)
+                    case DrawTextBlock():
+                        for line in op.lines:
+                            content += self._text(card, line)
+                    case DrawRectangle():
+                        content += self._rectangle(card, op)
+                    case DrawImage():
+                        content += self._image(renderer, op)
+                    case _:
+                        raise ValueError(op)
+            content.append(b"Q")
+
+            pdf = self._pdf
+            page_ref = pdf.next_object_id(0)
+            contents_ref = pdf.write_obj(
+                None,
+                stream=zlib.compress(b"\n".join(content)),
+                Filter=PdfParser.PdfName('FlateDecode'),
+            )
+            pdf.write_page(
+                page_ref,
+                Resources=self._resources_ref,
+                MediaBox=[0, 0, round(card._width * scale, 2), round(card._height * scale, 2)],
+                Contents=contents_ref,
+            )
+            pdf.pages.append(page_ref)
+        self._pages_written += 1
+
+    #region Drawing
+    def _rectangle(self, card: Card, op: DrawRectangle) -> list[bytes]:
+        # the same pixels ImageDraw covers: whole-pixel corners, both of them
+        # inside the box, with the outline drawn inward from the edges
+        x0, y0, x1, y1 = (int(v) for v in op.box)
+        width, height = x1 - x0 + 1, y1 - y0 + 1
+        outlined = op.width and _rgb(op.outline) != (_rgb(op.fill) if op.fill is not None else None)
+        if outlined and 2 * int(op.width) > min(width, height):
+            # an outline thicker than half the box spills out of it, in a
+            # pattern only ImageDraw knows
+            return self._rectangle_image(card, op)
+        drawing = []
+        if op.fill is not None:
+            drawing.append(b"%s rg %d %d %d %d re f" % (_rgb(op.fill), x0, y0, width, height))
+        if outlined:
+            thickness = int(op.width)
+            outer = b"%d %d %d %d re" % (x0, y0, width, height)
+            if width > 2 * thickness and height > 2 * thickness:
+                inner = b" %d %d %d %d re" % (x0 + thickness, y0 + thickness, width - 2 * thickness, height - 2 * thickness)
+                drawing.append(b"%s rg %s%s f*" % (_rgb(op.outline), outer, inner))
+            else:
+                drawing.append(b"%s rg %s f" % (_rgb(op.outline), outer))
+        return drawing
+
+    def _rectangle_image(self, card: Card, op: DrawRectangle) -> list[bytes]:
+        # drawn the way the bitmap renderer would, then kept as an image
+        name = self._images.get(op)
+        if name is None:
+            art = Image.new('RGBA', (card._width, card._height), (0, 0, 0, 0))
+            ImageDraw.Draw(art).rectangle(op.box, fill=op.fill, outline=op.outline, width=op.width)
+            box = art.getbbox()
+            if box is None:
+                return []
+            name = self._images[op] = self._write_image(art.crop(box))
+            self._image_boxes[name] = box
+        return self._place(name)
+
+    def _text(self, card: Card, op: DrawText) -> list[bytes]:
+        font = self._font(op.font)
+        if font is None:
+            return self._text_image(card, op)
+
+        drawing = []
+        for x, y, anchor, line in _text_lines(op):
+            if not line.strip():
+                continue
+            # anchors are offsets from the baseline's start, which is where
+            # PDF text starts
+            left, top, _, _ = op.font.getbbox(line, anchor=anchor)
+            base_left, base_top, _, _ = op.font.getbbox(line, anchor='ls')
+            drawing.append(b"BT /%s %s Tf %s rg 1 0 0 -1 %s %s Tm [%s] TJ ET" % (
+                font.name.encode(), _num(op.font.size), _rgb(op.fill),
+                _num(x + left - base_left), _num(y + top - base_top),
+                font.show(line, op.font),
+            ))
+        return drawing
+
+    def _text_image(self, card: Card, op: DrawText) -> list[bytes]:
+        # drawn the way the bitmap renderer would, then kept as an image
+        # the color of the text, with the drawing as its transparency
+        name = self._images.get(op)
+        if name is None:
+            mask = Image.new('L', (card._width, card._height), 0)
+            ImageDraw.Draw(mask).text(op.xy, op.text, fill=255, font=op.font, anchor=op.anchor)
+            box = mask.getbbox()
+            if box is None:
+                return []
+            mask = mask.crop(box)
+            art = Image.new('RGBA', mask.size, op.fill)
+            art.putalpha(mask)
+            name = self._images[op] = self._write_image(art)
+            self._image_boxes[name] = box
+        return self._place(name)
+
+    def _place(self, name: str) -> list[bytes]:
+        # an image drawn to fill the box it was cropped from
+        left, top, right, bottom = self._image_boxes[name]
+        return [b"q %d 0 0 %d %d %d cm /%s Do Q" % (right - left, top - bottom, left, bottom, name.encode())]
+
+    def _image(self, renderer: SingleImageRenderer, op: DrawImage) -> list[bytes]:
+        layout = op.layout
+        key = _art_key(op.image, layout.width, layout.height, layout.scale, op.zoom, renderer._resampling)
+        art = renderer._load_art(op.image, layout.width, layout.height, layout.scale, op.zoom)
+        name = self._images.get(key)
+        if name is None:
+            name = self._images[key] = self._write_image(art)
+        left, top = art_position(layout, art.width, art.height)
+        # images fill a unit square from the bottom up
+        return [b"q %d 0 0 %d %d %d cm /%s Do Q" % (art.width, -art.height, left, top + art.height, name.encode())]
+
+    def _write_image(self, art: Image.Image) -> str:
+        name = f"Im{len(self._image_refs)}"
+        logger.debug(f"embedding image {name}")
+        pdf = self._pdf
+        alpha = art.getchannel('A') if art.mode == 'RGBA' else None
+        smask = None
+        if alpha is not None and alpha.getextrema() != (255, 255):
+            smask = pdf.write_obj(
+                None,
+                stream=zlib.compress(alpha.tobytes()),
+                Type=PdfParser.PdfName('XObject'),
+                Subtype=PdfParser.PdfName('Image'),
+                Width=art.width,
+                Height=art.height,
+                ColorSpace=PdfParser.PdfName('DeviceGray'),
+                BitsPerComponent=8,
+                Filter=PdfParser.PdfName('FlateDecode'),
+            )
+        extra = {'SMask': smask} if smask is not None else {}
+        self._image_refs[name] = pdf.write_obj(
+            None,
+            stream=zlib.compress(art.convert('RGB').tobytes()),
+            Type=PdfParser.PdfName('XObject'),
+            Subtype=PdfParser.PdfName('Image'),
+            Width=art.width,
+            Height=art.height,
+            ColorSpace=PdfParser.PdfName('DeviceRGB'),
+            BitsPerComponent=8,
+            Filter=PdfParser.PdfName('FlateDecode'),
+            **extra,
+        )
+        return name
+
+    def _font(self, font: FreeTypeFont) -> _EmbeddedFont | None:
+        if not isinstance(font, ImageFont.FreeTypeFont):
+            return None
+        ref = pack_font(font)
+        if isinstance(ref, FontRef):
+            if ref.variation is not None:
+                return None
+            key = (ref.path, ref.index)
+        elif hasattr(font.path, 'getvalue'):
+            # such as Pillow's built-in font
+            key = font.path
+        else:
+            return None
+
+        if key not in self._fonts:
+            self._fonts[key] = _EmbeddedFont.load(font, ref, f"F{len(self._fonts)}")
+        return self._fonts[key]
+    #endregion
+
+    def close(self):
+        "Finish the PDF, writing the fonts and the page list."
+        pdf = self._pdf
+        if self._pages_written == 0:
+            pdf.close()
+            raise ValueError("a PDF needs at least one page")
+
+        fonts = {font.name: font.write(pdf) for font in self._fonts.values() if font is not None}
+        resources = {'ProcSet': [PdfParser.PdfName('PDF'), PdfParser.PdfName('Text'), PdfParser.PdfName('ImageC')]}
+        if fonts:
+            resources['Font'] = PdfParser.PdfDict(fonts)
+        if self._image_refs:
+            resources['XObject'] = PdfParser.PdfDict(self._image_refs)
+        pdf.write_obj(self._resources_ref, **resources)
+
+        _write_page_list(pdf)
+        pdf.write_xref_and_trailer()
+        pdf.f.flush()
+        pdf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._pdf.close()
+
+
+class _EmbeddedFont:
+    "A font used in a vector PDF, and the glyphs it has been asked to show."
+    def __init__(self, sfnt: Sfnt, name: str):
+        self.name = name
+        self._sfnt = sfnt
+        self._scale = 1000 / sfnt.units_per_em
+        self._chars: dict[int, str] = {}
+
+    @classmethod
+    def load(cls, font: FreeTypeFont, ref, name: str) -> _EmbeddedFont | None:
+        try:
+            if isinstance(ref, FontRef):
+                with open(ref.path, 'rb') as font_in:
+                    data = font_in.read()
+                sfnt = Sfnt(data, ref.index)
+            else:
+                sfnt = Sfnt(font.path.getvalue(), font.index)
+        except (OSError, ValueError) as e:
+            logger.debug(f"can't embed {font.getname()}, drawing its text as images: {e}")
+            return None
+        logger.debug(f"embedding {sfnt.postscript_name} as {name}")
+        return cls(sfnt, name)
+
+    def show(self, text: str, font: FreeTypeFont) -> bytes:
+        """
+        The glyphs for `text`, with nudges between them so each lands where
+        Pillow would put it at this size.
+        """
+        shown = []
+        size = font.size
+        for char, advance in zip(text, metrics(font).advances(text)):
+            glyph = self._sfnt.glyph(char)
+            self._chars.setdefault(glyph, char)
+            shown.append(b"<%04X>" % glyph)
+            # positive numbers in TJ move the next glyph back
+            nudge = (self._sfnt.advance(glyph) * self._scale) - advance * 1000 / size
+            if abs(nudge) >= 0.05:
+                shown.append(_num(nudge, 1))
+        return b" ".join(shown)
+
+    def write(self, pdf) -> object:
+        "Write the font, cut down to the glyphs it has shown, and return its reference."
+        sfnt = self._sfnt
+        glyphs = sorted(self._chars)
+        # subset fonts get a tag made from their contents
+        digest = hashlib.sha256(repr(glyphs).encode()).digest()
+        tag = ''.join(chr(ord('A') + byte % 26) for byte in digest[:6])
+        base_font = PdfParser.PdfName(f"{tag}+{sfnt.postscript_name}")
+        scale = self._scale
+
+        program = sfnt.subset(set(glyphs))
+        if sfnt.is_cff:
+            file_key = 'FontFile3'
+            file_ref = pdf.write_obj(
+                None, stream=zlib.compress(program),
+                Subtype=PdfParser.PdfName('OpenType'), Filter=PdfParser.PdfName('FlateDecode'),
+            )
+            subtype = 'CIDFontType0'
+        else:
+            file_key = 'FontFile2'
+            file_ref = pdf.write_obj(
+                None, stream=zlib.compress(program),
+                Length1=len(program), Filter=PdfParser.PdfName('FlateDecode'),
+            )
+            subtype = 'CIDFontType2'
+
+        x_min, y_min, x_max, y_max = sfnt.bbox
+        descriptor_ref = pdf.write_obj(
+            None,
+            Type=PdfParser.PdfName('FontDescriptor'),
+            FontName=base_font,
+            Flags=4,
+            FontBBox=[round(x_min * scale), round(y_min * scale), round(x_max * scale), round(y_max * scale)],
+            ItalicAngle=round(sfnt.italic_angle, 2),
+            Ascent=round(sfnt.ascent * scale),
+            Descent=round(sfnt.descent * scale),
+            CapHeight=round(sfnt.cap_height * scale),
+            StemV=80,
+            **{file_key: file_ref},
+        )
+        widths = []
+        for glyph in glyphs:
+            widths += [glyph, [round(sfnt.advance(glyph) * scale)]]
+        extra = {'CIDToGIDMap': PdfParser.PdfName('Identity')} if subtype == 'CIDFontType2' else {}
+        cid_font_ref = pdf.write_obj(
+            None,
+            Type=PdfParser.PdfName('Font'),
+            Subtype=PdfParser.PdfName(subtype),
+            BaseFont=base_font,
+            CIDSystemInfo=PdfParser.PdfDict(Registry=b'Adobe', Ordering=b'Identity', Supplement=0),
+            FontDescriptor=descriptor_ref,
+            W=widths,
+            **extra,
+        )
+        to_unicode_ref = pdf.write_obj(
+            None,
+            stream=zlib.compress(_to_unicode(self._chars)),
+            Filter=PdfParser.PdfName('FlateDecode'),
+        )
+        return pdf.write_obj(
+            None,
+            Type=PdfParser.PdfName('Font'),
+            Subtype=PdfParser.PdfName('Type0'),
+            BaseFont=base_font,
+            Encoding=PdfParser.PdfName('Identity-H'),
+            DescendantFonts=[cid_font_ref],
+            ToUnicode=to_unicode_ref,
+        )
+
+
+def _open(filename: str):
+    pdf = PdfParser.PdfParser(filename=filename, mode='w+b')
+    pdf.info['Title'] = os.path.splitext(os.path.basename(filename))[0]
+    pdf.info['CreationDate'] = time.gmtime()
+    pdf.info['ModDate'] = time.gmtime()
+    pdf.start_writing()
+    return pdf
+
+
+def _write_page_list(pdf):
+    # the same catalog and page tree write_catalog() makes, but using the
+    # page tree number reserved at the start
+    pdf.root_ref = pdf.next_object_id(pdf.f.tell())
+    pdf.write_obj(pdf.root_ref, Type=PdfParser.PdfName('Catalog'), Pages=pdf.pages_ref)
+    pdf.write_obj(
+        pdf.pages_ref,
+        Type=PdfParser.PdfName('Pages'),
+        Count=len(pdf.pages),
+        Kids=pdf.pages,
+    )
+
+
+def _text_lines(op: DrawText) -> list[tuple[float, float, str, str]]:
+    "Where ImageDraw puts each line of `op`: (x, y, anchor, line)."
+    x, y = op.xy
+    lines = op.text.split('\n')
+    if len(lines) == 1:
+        return [(x, y, op.anchor, op.text)]
+
+    # lines are left-aligned with each other, and the block as a whole
+    # goes where the anchor says
+    spacing = op.font.getbbox('A')[3] + 4
+    widths = [op.font.getlength(line) for line in lines]
+    widest = max(widths)
+    if op.anchor[1] == 'm':
+        y -= (len(lines) - 1) * spacing / 2
+    elif op.anchor[1] == 'd':
+        y -= (len(lines) - 1) * spacing
+
+    placed = []
+    for line, width in zip(lines, widths):
+        left = x
+        if op.anchor[0] == 'm':
+            left -= (widest - width) / 2
+        elif op.anchor[0] == 'r':
+            left -= widest - width
+        placed.append((left, y, op.anchor, line))
+        y += spacing
+    return placed
+
+
+def _to_unicode(chars: dict[int, str]) -> bytes:
+    "A CMap so text copied out of the PDF comes out as the right characters."
+    entries = [b"<%04X> <%s>" % (glyph, char.encode('utf-16-be').hex().upper().encode()) for glyph, char in sorted(chars.items())]
+    blocks = []
+    # a bfchar block holds at most 100 entries
+    for start in range(0, len(entries), 100):
+        chunk = entries[start:start + 100]
+        blocks.append(b"%d beginbfchar\n%s\nendbfchar" % (len(chunk), b"\n".join(chunk)))
+    return b"\n".join([
+        b"/CIDInit /ProcSet findresource begin",
+        b"12 dict begin",
+        b"begincmap",
+        b"/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def",
+        b"/CMapName /Adobe-Identity-UCS def",
+        b"/CMapType 2 def",
+        b"1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange",
+        *blocks,
+        b"endcmap",
+        b"CMapName currentdict /CMap defineresource pop",
+        b"end",
+        b"end",
+    ])
+
+
+def _rgb(color: Color) -> bytes:
+    # PDF pages have no transparency to fill into, so like a bitmap page,
+    # colors lose their alpha
+    red, green, blue, _ = ImageColor.getcolor(color, 'RGBA') if isinstance(color, str) else (*color[:3], 255)
+    return b"%s %s %s" % (_num(red / 255), _num(green / 255), _num(blue / 255))
+
+
+def _num(value: float, places: int = 3) -> bytes:
+    "A number the way PDF writes them: no exponents, no trailing zeros."
+    text = f"{value:.{places}f}".rstrip('0').rstrip('.')
+    return b"0" if text in ('', '-0') else text.encode()
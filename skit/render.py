@@ -1,150 +1,583 @@
+from __future__ import annotations
 from enum import Enum
+from functools import cache, lru_cache
 import logging
 import math
-from PIL import Image, ImageDraw, ImageFont
-from skit._types import Color, Alignment, Scale
+import os
+from pathlib import Path
+import threading
+from typing import TYPE_CHECKING, NamedTuple
+from skit._lazy import lazy_import
+from skit._types import Real, Color, Alignment, Scale, Resampling, TextFit, LayoutDef
+from skit.cache import art_store, asset_cache, text_cache
+from skit.fonts import FontRef, load_font, pack_font, unpack_font
+from skit import trace
+from skit._textfit import fit_text
+
+if TYPE_CHECKING:
+    from PIL.ImageFont import FreeTypeFont
+
+Image = lazy_import('PIL.Image')
+ImageDraw = lazy_import('PIL.ImageDraw')
+ImageFont = lazy_import('PIL.ImageFont')
 
 
 logger = logging.getLogger(__file__)
 
 
 # some defaults for fallback
-try:
-    _DEFAULT_FONT = ImageFont.truetype('Helvetica', 16)
-except OSError:
-    _DEFAULT_FONT = ImageFont.load_default()
 _DEFAULT_COLOR = 'black'
 _DEFAULT_THICKNESS = 1
 
 
+@cache
+def _default_font():
+    # found on first use rather than at import, which would load Pillow
+    # and maybe scan the font directories
+    try:
+        return load_font('Helvetica', 16)
+    except OSError:
+        return ImageFont.load_default()
+
+
 class DrawCommand(Enum):
     TEXT = 'text'
     RECTANGLE = 'rect'
     IMAGE = 'image'
 
 
+#region Commands
+# What cards store: what to draw and which layout to draw it in. These are
+# immutable, so a deck can hand the same command to every card.
+class TextCommand(NamedTuple):
+    layout: str
+    text: str
+    font: FreeTypeFont | None
+    color: Color | None
+    op = DrawCommand.TEXT
+
+
+class RectangleCommand(NamedTuple):
+    layout: str
+    color: Color | None
+    thickness: Real | None
+    filled: bool
+    op = DrawCommand.RECTANGLE
+
+
+class ImageCommand(NamedTuple):
+    layout: str
+    image: Path
+    zoom: Real = 1
+    """How much larger than its own pixel size the art is, before fitting."""
+    op = DrawCommand.IMAGE
+
+
+def scale_command(command, factor: float):
+    "`command` as drawn on a card scaled by `factor`."
+    match command:
+        case TextCommand():
+            return command._replace(font=_scale_font(command.font or _default_font(), factor))
+        case RectangleCommand():
+            # lines never get thinner than a pixel, so thumbnails keep them
+            thickness = command.thickness if command.thickness else _DEFAULT_THICKNESS
+            return command._replace(thickness=max(1, round(thickness * factor)))
+        case ImageCommand():
+            return command._replace(zoom=command.zoom * factor)
+        case _:
+            raise ValueError(command)
+
+
+@lru_cache(maxsize=1024)
+def _is_variable(font: FreeTypeFont) -> bool:
+    # Pillow can't say which variation a font is set to, and it can be
+    # changed at any time with set_variation_by_name() or
+    # set_variation_by_axes(), so nothing keyed by the font stays reliable
+    try:
+        font.get_variation_axes()
+    except (OSError, AttributeError, NotImplementedError):
+        # not a variable font, or a FreeType that can't vary fonts at all
+        return False
+    return True
+
+
+@lru_cache(maxsize=256)
+def _scale_font(font, factor: float):
+    ref = pack_font(font)
+    if isinstance(ref, FontRef):
+        # loading by FontRef keeps any variation
+        return unpack_font(ref._replace(size=ref.size * factor))
+    if isinstance(font, ImageFont.FreeTypeFont):
+        return font.font_variant(size=font.size * factor)
+    # bitmap fonts only come in one size
+    return font
+#endregion
+
+
+#region Compiled operations
+# What the renderer executes: a command with its layout already worked out
+# into pixel coordinates, anchors, and concrete colors.
+class DrawText(NamedTuple):
+    xy: tuple[Real, Real]
+    anchor: str
+    text: str
+    font: FreeTypeFont
+    fill: Color
+
+
+class DrawTextBlock(NamedTuple):
+    lines: tuple[DrawText, ...]
+
+
+class DrawRectangle(NamedTuple):
+    box: tuple[Real, Real, Real, Real]
+    fill: Color | None
+    outline: Color
+    width: Real
+
+
+class DrawImage(NamedTuple):
+    image: Path
+    layout: LayoutDef
+    zoom: Real = 1
+
+
+@lru_cache(maxsize=64 * 1024)
+def compile_command(command, layout: LayoutDef):
+    "Work out the pixel-level drawing operation for `command` in `layout`."
+    match command:
+        case TextCommand():
+            return _compile_text(command, layout)
+        case RectangleCommand():
+            return DrawRectangle(
+                box=(layout.x, layout.y, layout.x + layout.width, layout.y + layout.height),
+                fill=command.color if command.filled and command.color else None,
+                outline=command.color if command.color else _DEFAULT_COLOR,
+                width=command.thickness if command.thickness else _DEFAULT_THICKNESS,
+            )
+        case ImageCommand():
+            return DrawImage(command.image, layout, command.zoom)
+        case _:
+            raise ValueError(command)
+
+
+def _compile_text(command: TextCommand, layout: LayoutDef) -> DrawText | DrawTextBlock:
+    match layout.h_align:
+        case Alignment.BEGIN:
+            anchor_h = 'l'
+            x = layout.x
+        case Alignment.MIDDLE:
+            anchor_h = 'm'
+            x = layout.x + (layout.width // 2)
+        case Alignment.END:
+            anchor_h = 'r'
+            x = layout.x + layout.width
+        case _:
+            raise ValueError(f"h_align value '{layout.h_align}' unrecognized")
+
+    font = command.font if command.font else _default_font()
+    fill = command.color if command.color else _DEFAULT_COLOR
+    if layout.fit is not TextFit.NONE and isinstance(font, ImageFont.FreeTypeFont):
+        return _compile_text_block(command.text, font, fill, layout, anchor_h, x)
+
+    match layout.v_align:
+        case Alignment.BEGIN:
+            y = layout.y
+            anchor_v = 'a'
+        case Alignment.MIDDLE:
+            y = layout.y + (layout.height // 2)
+            anchor_v = 'm'
+        case Alignment.END:
+            y = layout.y + layout.height
+            anchor_v = 'd'
+        case _:
+            raise ValueError(f"v_align value '{layout.v_align}' unrecognized")
+
+    return DrawText(
+        xy=(x, y),
+        anchor=f"{anchor_h}{anchor_v}",
+        text=command.text,
+        font=font,
+        fill=fill,
+    )
+
+
+def _compile_text_block(text, font, fill, layout: LayoutDef, anchor_h: str, x: Real) -> DrawTextBlock:
+    fitted = fit_text(text, font, layout.fit, layout.width, layout.height)
+    block_height = len(fitted.lines) * fitted.line_height
+
+    match layout.v_align:
+        case Alignment.BEGIN:
+            top = layout.y
+        case Alignment.MIDDLE:
+            top = layout.y + (layout.height - block_height) // 2
+        case Alignment.END:
+            top = layout.y + layout.height - block_height
+        case _:
+            raise ValueError(f"v_align value '{layout.v_align}' unrecognized")
+
+    # each line is drawn on its own baseline, so every one of them can come
+    # from the text cache
+    return DrawTextBlock(tuple(
+        DrawText(
+            xy=(x, top + fitted.ascent + index * fitted.line_height),
+            anchor=f"{anchor_h}s",
+            text=line,
+            font=fitted.font,
+            fill=fill,
+        )
+        for index, line in enumerate(fitted.lines)
+    ))
+#endregion
+
+
+def art_position(layout: LayoutDef, width: int, height: int) -> tuple[int, int]:
+    "Where the top left of art `width` x `height` goes in `layout`."
+    match layout.h_align:
+        case Alignment.BEGIN:
+            left = layout.x
+        case Alignment.MIDDLE:
+            left = layout.x + (layout.width - width) // 2
+        case Alignment.END:
+            left = layout.x + layout.width - width
+        case _:
+            raise ValueError(f"h_align value '{layout.h_align}' unrecognized")
+
+    match layout.v_align:
+        case Alignment.BEGIN:
+            top = layout.y
+        case Alignment.MIDDLE:
+            top = layout.y + (layout.height - height) // 2
+        case Alignment.END:
+            top = layout.y + layout.height - height
+        case _:
+            raise ValueError(f"v_align value '{layout.v_align}' unrecognized")
+
+    return left, top
+
+
+def _art_key(image, width, height, scale, zoom, resampling) -> tuple:
+    "What art loaded for a layout is cached under."
+    return (os.fspath(image), os.stat(image).st_mtime_ns, width, height, scale, zoom, resampling)
+
+
+def _resampling_filter(resampling: Resampling):
+    # the filter that finishes resizing, and how many times its target size
+    # art may still be when the cheap steps (decoding JPEGs at a fraction of
+    # their size, then averaging blocks of pixels) hand it over
+    match resampling:
+        case Resampling.FAST:
+            return Image.Resampling.BILINEAR, 2.0
+        case Resampling.BEST:
+            return Image.Resampling.BICUBIC, 3.0
+        case _:
+            raise ValueError(f"resampling value '{resampling}' unrecognized")
+
+
+#region Culling
+# Before drawing, operations are checked from last to first. One that lands
+# entirely inside an opaque box drawn after it can't show, so it's skipped.
+# Boxes are (left, top, right, bottom) in pixels, right and bottom excluded.
+class CullStats(NamedTuple):
+    "How much drawing culling has skipped in this process."
+    ops: int
+    """Drawing operations checked."""
+    dropped: int
+    """Operations skipped because later drawing covers them."""
+
+
+_cull_lock = threading.Lock()
+_cull_counts = [0, 0]
+
+
+def cull_stats() -> CullStats:
+    """
+    How many drawing operations have been skipped because something drawn
+    later covers them. Cards drawn by `workers=` processes aren't counted.
+    """
+    with _cull_lock:
+        return CullStats(*_cull_counts)
+
+
+def reset_cull_stats():
+    "Start counting culled operations from zero."
+    with _cull_lock:
+        _cull_counts[:] = [0, 0]
+
+
+@lru_cache(maxsize=64 * 1024)
+def _extent(op) -> tuple[int, int, int, int] | None:
+    # every pixel `op` might touch, or None if that can't be worked out
+    # without drawing it; only called for ops that are all known in advance
+    match op:
+        case DrawRectangle():
+            box = _rectangle_box(op)
+            if box is None:
+                return None
+            x0, y0, x1, y1 = box
+            # an outline more than half as thick as the box spills out of it
+            # in ImageDraw, unless it's the fill color and never drawn
+            if 2 * op.width > min(x1 - x0, y1 - y0) and op.outline != op.fill:
+                return None
+            return box
+        case DrawText():
+            if not isinstance(op.font, ImageFont.FreeTypeFont) or '\n' in op.text:
+                return None
+            left, top, right, bottom = op.font.getbbox(op.text, anchor=op.anchor)
+            x, y = op.xy
+            # a pixel of slack for text drawn at fractional positions
+            return math.floor(x) + left - 1, math.floor(y) + top - 1, math.ceil(x) + right + 1, math.ceil(y) + bottom + 1
+        case DrawTextBlock():
+            boxes = [_extent(line) for line in op.lines]
+            if not boxes or None in boxes:
+                return None
+            return (
+                min(box[0] for box in boxes), min(box[1] for box in boxes),
+                max(box[2] for box in boxes), max(box[3] for box in boxes),
+            )
+        case DrawImage():
+            # fitted art stays inside its layout
+            layout = op.layout
+            return (
+                math.floor(layout.x), math.floor(layout.y),
+                math.ceil(layout.x + layout.width), math.ceil(layout.y + layout.height),
+            )
+        case _:
+            return None
+
+
+def _rectangle_box(op: DrawRectangle) -> tuple[int, int, int, int] | None:
+    # the pixels ImageDraw.rectangle() fills; it refuses boxes that are
+    # inside out, so those are left for it to complain about
+    x0, y0, x1, y1 = (int(v) for v in op.box)
+    if x1 < x0 or y1 < y0:
+        return None
+    return x0, y0, x1 + 1, y1 + 1
+
+
+def _inside(inner: tuple[int, int, int, int], outer: tuple[int, int, int, int]) -> bool:
+    return (
+        inner[0] >= inner[2] or inner[1] >= inner[3]
+        or outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+    )
+
+
+def _clip(box: tuple[int, int, int, int], width: int, height: int) -> tuple[int, int, int, int]:
+    return max(box[0], 0), max(box[1], 0), min(box[2], width), min(box[3], height)
+
+
+# whether each piece of art, as loaded for a layout, has no transparency
+# at all; keys are the asset cache's, so a changed file gets a new answer
+_opaque_art: dict[tuple, bool] = {}
+_MAX_OPAQUE_ART = 16 * 1024
+#endregion
+
+
 class SingleImageRenderer:
-    def __init__(self, layouts):
+    def __init__(self, layouts, resampling: Resampling = Resampling.BEST):
         self._layouts = layouts
+        self._resampling = resampling
+
+    def compile(self, commands) -> list:
+        "Turn commands into drawing operations using this renderer's layouts."
+        return [compile_command(cmd, self._layouts[cmd.layout]) for cmd in commands]
+
+    def render(
+        self,
+        width: int,
+        height: int,
+        background: Color,
+        commands: list,
+        base: Image.Image | None = None,
+    ) -> Image.Image:
+        """
+        Draw `commands` onto a new `width` x `height` image filled with
+        `background`, or onto a copy of `base` if it's given.
+        """
+        ops = self.compile(commands)
 
-    def render(self, width: int, height: int, background: Color, commands: list[dict]) -> Image.Image:
-        with Image.new('RGBA', (width, height), background) as im:
+        start = base.copy() if base is not None else Image.new('RGBA', (width, height), background)
+        with start as im:
             d = ImageDraw.Draw(im)
 
-            for cmd in commands:
-                cmd = cmd.copy()    # don't destroy the original command list
-                op = cmd.pop('op')
-                match op:
-                    case DrawCommand.TEXT:
-                        self._render_text(d, **cmd)
-                    case DrawCommand.RECTANGLE:
-                        self._render_rectangle(d, **cmd)
-                    case DrawCommand.IMAGE:
-                        self._render_image(im, **cmd)
-                    case _:
-                        raise ValueError(cmd)
+            shown = self.cull(ops, im.width, im.height)
+            for cmd, op, show in zip(commands, ops, shown):
+                if not show:
+                    continue
+                with trace.span(cmd.op.value, 'op', layout=cmd.layout):
+                    match op:
+                        case DrawText():
+                            self._render_text(im, d, op)
+                        case DrawTextBlock():
+                            for line in op.lines:
+                                self._render_text(im, d, line)
+                        case DrawRectangle():
+                            self._render_rectangle(d, op)
+                        case DrawImage():
+                            self._render_image(im, op)
+                        case _:
+                            raise ValueError(op)
 
             return im
 
-    def _render_text(self, d, layout, text, color, font):
-        logger.debug(f"rendering text '{text}' at {layout}")
-        layout = self._layouts[layout]
-
-        match layout['h_align']:
-            case Alignment.BEGIN:
-                anchor_h = 'l'
-                x = layout['x']
-            case Alignment.MIDDLE:
-                anchor_h = 'm'
-                x = layout['x'] + (layout['width'] // 2)
-            case Alignment.END:
-                anchor_h = 'r'
-                x = layout['x'] + layout['width']
-            case _:
-                raise ValueError(f"h_align value '{layout['h_align']}' unrecognized")
-
-        match layout['v_align']:
-            case Alignment.BEGIN:
-                y = layout['y']
-                anchor_v = 'a'
-            case Alignment.MIDDLE:
-                y = layout['y'] + (layout['height'] // 2)
-                anchor_v = 'm'
-            case Alignment.END:
-                y = layout['y'] + layout['height']
-                anchor_v = 'd'
+    def cull(self, ops: list, width: int, height: int) -> list[bool]:
+        """
+        Which of `ops` can show when drawn in order on a `width` x `height`
+        image: False for each one that opaque drawing after it hides.
+        """
+        shown = [True] * len(ops)
+        covers: list[tuple[int, int, int, int]] = []
+        with trace.span('cull', 'op', ops=len(ops)):
+            for index in range(len(ops) - 1, -1, -1):
+                op = ops[index]
+                # nothing needs measuring until something can hide it
+                if covers:
+                    extent = self._extent(op)
+                    if extent is not None:
+                        extent = _clip(extent, width, height)
+                        if any(_inside(extent, cover) for cover in covers):
+                            shown[index] = False
+                            continue
+                if index:
+                    cover = self._cover(op)
+                    if cover is not None:
+                        covers.append(_clip(cover, width, height))
+
+        dropped = shown.count(False)
+        if dropped:
+            logger.debug(f"culled {dropped} of {len(ops)} operations")
+        with _cull_lock:
+            _cull_counts[0] += len(ops)
+            _cull_counts[1] += dropped
+        return shown
+
+    def _extent(self, op) -> tuple[int, int, int, int] | None:
+        if isinstance(op, DrawImage) and op.layout.scale not in (Scale.FIT, Scale.DOWN):
+            # art that isn't shrunk to fit might spill out of its layout
+            return self._art_box(op)[0]
+        return _extent(op)
+
+    def _cover(self, op) -> tuple[int, int, int, int] | None:
+        # the pixels `op` leaves a solid color, whatever was there before
+        match op:
+            case DrawRectangle() if op.fill is not None:
+                # ImageDraw sets pixels rather than blending, so a filled
+                # box hides what's under it even if its color is see-through
+                return _rectangle_box(op)
+            case DrawImage():
+                box, opaque = self._art_box(op)
+                return box if opaque else None
             case _:
-                raise ValueError(f"v_align value '{layout['v_align']}' unrecognized")
-
-        d.text(
-            [x, y],
-            text,
-            fill=color if color else _DEFAULT_COLOR,
-            font=font if font else _DEFAULT_FONT,
-            anchor=f"{anchor_h}{anchor_v}",
-        )
-    
-    def _render_rectangle(self, d, layout, color, thickness, filled):
-        logger.debug(f"rendering rectangle on {layout}")
-        layout = self._layouts[layout]
-        d.rectangle(
-            [
-                layout['x'],
-                layout['y'],
-                layout['x'] + layout['width'],
-                layout['y'] + layout['height'],
-            ],
-            fill=color if filled and color else None,
-            outline=color if color else _DEFAULT_COLOR,
-            width=thickness if thickness else _DEFAULT_THICKNESS,
+                return None
+
+    def _art_box(self, op: DrawImage) -> tuple[tuple[int, int, int, int], bool]:
+        # where the art goes and whether it hides everything under it; the
+        # art is cached, so drawing it later doesn't load it again
+        layout = op.layout
+        args = (op.image, layout.width, layout.height, layout.scale, op.zoom)
+        art = self._load_art(*args)
+        key = _art_key(*args, self._resampling)
+        opaque = _opaque_art.get(key)
+        if opaque is None:
+            if len(_opaque_art) >= _MAX_OPAQUE_ART:
+                _opaque_art.clear()
+            opaque = _opaque_art[key] = art.getchannel('A').getextrema() == (255, 255)
+        left, top = art_position(layout, art.width, art.height)
+        return (left, top, left + art.width, top + art.height), opaque
+
+    def _render_text(self, im, d, op: DrawText):
+        logger.debug(f"rendering text '{op.text}' at {op.xy}")
+        x, y = op.xy
+
+        if (
+            not isinstance(op.font, ImageFont.FreeTypeFont) or '\n' in op.text or x != int(x) or y != int(y)
+            or _is_variable(op.font)
+        ):
+            # the cache only holds single lines drawn at whole-pixel positions,
+            # in fonts whose glyphs can't change under the same key
+            d.text(op.xy, op.text, fill=op.fill, font=op.font, anchor=op.anchor)
+            return
+
+        mask, (left, top) = text_cache.get(
+            (op.text, pack_font(op.font), op.anchor),
+            lambda: self._rasterize_text(op.text, op.font, op.anchor),
         )
+        if mask.width and mask.height:
+            x, y = int(x) + left, int(y) + top
+            im.paste(op.fill, (x, y, x + mask.width, y + mask.height), mask)
+
+    def _rasterize_text(self, text, font, anchor):
+        logger.debug(f"rasterizing '{text}'")
+        left, top, right, bottom = font.getbbox(text, anchor=anchor)
+        mask = Image.new('L', (max(right - left, 0), max(bottom - top, 0)), 0)
+        ImageDraw.Draw(mask).text((-left, -top), text, fill=255, font=font, anchor=anchor)
+        return mask, (left, top)
+
+    def _render_rectangle(self, d, op: DrawRectangle):
+        logger.debug(f"rendering rectangle at {op.box}")
+        d.rectangle(op.box, fill=op.fill, outline=op.outline, width=op.width)
 
-    def _render_image(self, im, layout, image):
-        logger.debug(f"rendering image at {layout}")
-        layout = self._layouts[layout]
+    def _render_image(self, im, op: DrawImage):
+        logger.debug(f"rendering image {op.image}")
+        layout = op.layout
+        art = self._load_art(op.image, layout.width, layout.height, layout.scale, op.zoom)
+        im.alpha_composite(art, art_position(layout, art.width, art.height))
+
+    def _load_art(self, image, width, height, scale, zoom=1) -> Image.Image:
+        # the cached copy is shared, so callers must never draw on it
+        key = _art_key(image, width, height, scale, zoom, self._resampling)
+
+        def decode():
+            with trace.span('decode', 'asset', image=image):
+                return self._decode_art(image, width, height, scale, zoom)
+
+        # another run or worker process may have already done the decoding
+        return asset_cache.get(key, lambda: art_store.get(image, (width, height, scale, zoom, self._resampling), decode))
+
+    def _decode_art(self, image, width, height, scale, zoom=1) -> Image.Image:
+        logger.debug(f"decoding {image} for a {width}x{height} layout")
+        resample, gap = _resampling_filter(self._resampling)
         with Image.open(image) as art:
-            # compute new image scale
-            proposed_scale = self._pick_image_size(art.width, art.height, layout['width'], layout['height'])
-            match layout['scale']:
-                case Scale.FIT:
-                    art = art.resize(proposed_scale)
-                case Scale.UP:
-                    if art.width < proposed_scale[0] or art.height < proposed_scale[1]:
-                        art = art.resize(proposed_scale)
-                case Scale.DOWN:
-                    if art.width > proposed_scale[0] or art.height > proposed_scale[1]:
-                        art = art.resize(proposed_scale)
-                case Scale.NONE:
-                    pass    # there is nothing to do
-                case _:
-                    raise ValueError(f"scale value '{layout['scale']}' unrecognized")
-
-            match layout['h_align']:
-                case Alignment.BEGIN:
-                    left = layout['x']
-                case Alignment.MIDDLE:
-                    left = layout['x'] + (layout['width'] - art.width) // 2
-                case Alignment.END:
-                    left = layout['x'] + layout['width'] - art.width
-                case _:
-                    raise ValueError(f"h_align value '{layout['h_align']}' unrecognized")
-
-            match layout['v_align']:
-                case Alignment.BEGIN:
-                    top = layout['y']
-                case Alignment.MIDDLE:
-                    top = layout['y'] + (layout['height'] - art.height) // 2
-                case Alignment.END:
-                    top = layout['y'] + layout['height'] - art.height
-                case _:
-                    raise ValueError(f"v_align value '{layout['v_align']}' unrecognized")
-
-            im.alpha_composite(art, (left, top))
+            size = self._art_size(art.size, width, height, scale, zoom)
+            # a JPEG can decode straight to a half, quarter, or eighth of its
+            # size, which is far quicker than decoding all of it
+            art.draft(None, (round(size[0] * gap), round(size[1] * gap)))
+            art = art.convert('RGBA')
+
+        if size != art.size:
+            art = art.resize(size, resample, reducing_gap=gap)
+        return art
+
+    def _art_size(self, art_size, width, height, scale, zoom=1) -> tuple[int, int]:
+        # on a scaled card, art's own size is scaled too, so it fits (or
+        # doesn't) the same way it does at full size
+        natural = (max(1, round(art_size[0] * zoom)), max(1, round(art_size[1] * zoom)))
+
+        # compute new image scale
+        proposed_scale = self._pick_image_size(*natural, width, height)
+        match scale:
+            case Scale.FIT:
+                size = proposed_scale
+            case Scale.UP:
+                if natural[0] < proposed_scale[0] or natural[1] < proposed_scale[1]:
+                    size = proposed_scale
+                else:
+                    size = natural
+            case Scale.DOWN:
+                if natural[0] > proposed_scale[0] or natural[1] > proposed_scale[1]:
+                    size = proposed_scale
+                else:
+                    size = natural
+            case Scale.NONE:
+                size = natural
+            case _:
+                raise ValueError(f"scale value '{scale}' unrecognized")
+        return size
 
     def _pick_image_size(self, img_width, img_height, layout_width, layout_height):
         if img_width == layout_width and img_height == layout_height:
             return img_width, img_height
-        
+
         # unpacking the logic below...
         #   ratio_width = image.width / layout.width
         #   ratio_height = image.height / layout.height
@@ -155,5 +588,5 @@ class SingleImageRenderer:
         scale_factor = max(img_width / layout_width, img_height / layout_height)
         new_width = math.floor(img_width / scale_factor)
         new_height = math.floor(img_height / scale_factor)
-        
+
         return new_width, new_height
@@ -0,0 +1,135 @@
+"""
+Laying cards out on printable sheets.
+
+`skit.Deck.render_sheets()` uses this to place cards in a grid on a sheet of
+paper, with optional gutters between cards and cut marks in the margins.
+"""
+from __future__ import annotations
+import logging
+import math
+from typing import NamedTuple
+from skit._lazy import lazy_import
+from skit._types import Color
+
+Image = lazy_import('PIL.Image')
+ImageDraw = lazy_import('PIL.ImageDraw')
+
+
+logger = logging.getLogger(__file__)
+
+
+PAPER_SIZES: dict[str, tuple[float, float]] = {
+    'letter': (8.5, 11),
+    'legal': (8.5, 14),
+    'tabloid': (11, 17),
+    'a3': (297 / 25.4, 420 / 25.4),
+    'a4': (210 / 25.4, 297 / 25.4),
+    'a5': (148 / 25.4, 210 / 25.4),
+}
+"""Common paper sizes, as (width, height) in inches."""
+
+
+class SheetLayout(NamedTuple):
+    "Where cards go on a sheet. All measurements are in pixels."
+    width: int
+    """Width of the sheet."""
+    height: int
+    """Height of the sheet."""
+    card_width: int
+    """Width of each card slot, including bleed."""
+    card_height: int
+    """Height of each card slot, including bleed."""
+    columns: int
+    """Cards across each sheet."""
+    rows: int
+    """Cards down each sheet."""
+    left: int
+    """Where the first column starts."""
+    top: int
+    """Where the first row starts."""
+    gutter: int
+    """Space between neighboring cards."""
+    bleed: int
+    """How far inside each card the cut line is."""
+
+    @classmethod
+    def fit(
+        cls,
+        paper: str | tuple[float, float],
+        dpi: int,
+        card_width: int,
+        card_height: int,
+        margin: int,
+        gutter: int,
+        bleed: int,
+    ) -> SheetLayout:
+        "Fit as many cards as possible on the paper, centering the grid."
+        if isinstance(paper, str):
+            paper = PAPER_SIZES[paper.lower()]
+        width, height = round(paper[0] * dpi), round(paper[1] * dpi)
+
+        columns = (width - 2 * margin + gutter) // (card_width + gutter)
+        rows = (height - 2 * margin + gutter) // (card_height + gutter)
+        if columns < 1 or rows < 1:
+            raise ValueError(f"a {card_width}x{card_height} card doesn't fit on a {width}x{height} sheet")
+
+        grid_width = columns * card_width + (columns - 1) * gutter
+        grid_height = rows * card_height + (rows - 1) * gutter
+        return cls(
+            width=width,
+            height=height,
+            card_width=card_width,
+            card_height=card_height,
+            columns=columns,
+            rows=rows,
+            left=(width - grid_width) // 2,
+            top=(height - grid_height) // 2,
+            gutter=gutter,
+            bleed=bleed,
+        )
+
+    @property
+    def per_sheet(self) -> int:
+        "How many cards fit on one sheet."
+        return self.columns * self.rows
+
+    def sheet_count(self, card_count: int) -> int:
+        "How many sheets it takes to hold `card_count` cards."
+        return math.ceil(card_count / self.per_sheet)
+
+    def position(self, slot: int) -> tuple[int, int]:
+        "Top-left corner of the card in `slot`, counting across then down."
+        row, column = divmod(slot, self.columns)
+        return (
+            self.left + column * (self.card_width + self.gutter),
+            self.top + row * (self.card_height + self.gutter),
+        )
+
+    def new_sheet(self, cut_marks: bool, color: Color = 'white') -> Image.Image:
+        "A blank sheet, with cut marks drawn in the margins if asked for."
+        sheet = Image.new('RGB', (self.width, self.height), color)
+        if cut_marks:
+            self._draw_cut_marks(sheet)
+        return sheet
+
+    def _draw_cut_marks(self, sheet: Image.Image):
+        d = ImageDraw.Draw(sheet)
+        right = self.left + self.columns * self.card_width + (self.columns - 1) * self.gutter
+        bottom = self.top + self.rows * self.card_height + (self.rows - 1) * self.gutter
+
+        # one tick in the margin lined up with each cut, on every side
+        # that has a margin to draw in
+        for column in range(self.columns):
+            x = self.left + column * (self.card_width + self.gutter)
+            for cut in (x + self.bleed, x + self.card_width - self.bleed - 1):
+                if self.top > 0:
+                    d.line([(cut, 0), (cut, self.top - 1)], fill='black')
+                if bottom < self.height:
+                    d.line([(cut, bottom), (cut, self.height - 1)], fill='black')
+        for row in range(self.rows):
+            y = self.top + row * (self.card_height + self.gutter)
+            for cut in (y + self.bleed, y + self.card_height - self.bleed - 1):
+                if self.left > 0:
+                    d.line([(0, cut), (self.left - 1, cut)], fill='black')
+                if right < self.width:
+                    d.line([(right, cut), (self.width - 1, cut)], fill='black')
@@ -0,0 +1,268 @@
+"""
+Building cards straight from data records.
+
+A `Template` describes a card once: its size, background, layouts, the
+drawing every card shares, and which record fields fill in which layouts.
+`skit.Deck.from_records()` then makes one card per record as it's rendered,
+so a deck of any size renders in constant memory:
+
+```python
+template = skit.Template(750, 1050)
+template.layouts_map(skit.load_layouts('layouts.json'))
+template.rectangle('border', 'black', 6)
+template.text_field('name', 'title', font=large_text)
+template.image_field('art', 'art', directory='assets')
+template.each(draw_statsbox, lambda record: 'stats' in record)
+
+records = skit.template.read_records('cards.csv')
+skit.Deck.from_records(records, template).render_png('card_{index}.png')
+```
+
+A field may be a key into the record or a function that takes the record
+and returns the value. If a record doesn't have the field, or it's `None`,
+nothing is drawn for it.
+"""
+from __future__ import annotations
+from collections.abc import Sequence
+import csv
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Mapping
+from skit._types import Real, LayoutDef, Color, Alignment, Resampling
+from skit.card import BaseLayer, Card, normalize_layoutdef
+from skit._manifest import note_source
+from skit.encode import DEFAULT, Encoder
+from skit.render import TextCommand, RectangleCommand, ImageCommand
+
+if TYPE_CHECKING:
+    from PIL.ImageFont import FreeTypeFont
+
+
+logger = logging.getLogger(__file__)
+
+
+Record = Mapping[str, Any]
+Field = str | Callable[[Record], Any]
+
+
+class Template:
+    "A card design filled in from data records, one card per record."
+    def __init__(self, width: int = 750, height: int = 1050):
+        """Create a template for cards of a certain `width` and `height`."""
+        self._width = width
+        self._height = height
+        self._layouts: dict[str, LayoutDef] = {}
+        self._background = '#ffffff00'
+        self._encoder = DEFAULT
+        self._resampling = Resampling.BEST
+        # each step is either a command every card gets, or a function
+        # called with the card and its record
+        self._steps: list = []
+
+    #region Card manipulation
+    def background(self, color: str):
+        "Set the background color for every card."
+        assert type(color) is str
+
+        logger.debug(f"Template.background({color})")
+        self._background = color
+
+    def encoder(self, encoder: Encoder):
+        "Choose the file format and compression used by `render_png()`."
+        assert isinstance(encoder, Encoder)
+
+        logger.debug(f"Template.encoder({encoder})")
+        self._encoder = encoder
+
+    def resampling(self, resampling: Resampling):
+        "Choose how carefully art is resized on every card."
+        assert isinstance(resampling, Resampling)
+
+        logger.debug(f"Template.resampling({resampling})")
+        self._resampling = resampling
+
+    def layout(self, name: str, layoutdef: LayoutDef):
+        "Add a layout to every card."
+        assert Alignment(layoutdef.h_align)
+        assert Alignment(layoutdef.v_align)
+
+        logger.debug(f"Template.layout({name}, ...)")
+        self._layouts[name] = normalize_layoutdef(layoutdef)
+
+    def layouts(self, names: Sequence[str], layoutdefs: Sequence[LayoutDef]):
+        "Add multiple layouts to every card."
+        assert len(names) == len(layoutdefs), "mismatched names/layoutdefs arguments"
+
+        for name, layoutdef in zip(names, layoutdefs):
+            self.layout(name, layoutdef)
+
+    def layouts_map(self, layouts: Mapping[str, LayoutDef]):
+        "Add multiple layouts from a dictionary to every card."
+        for name, layoutdef in layouts.items():
+            self.layout(name, layoutdef)
+
+    def text(self, text: str, layout: str, font: FreeTypeFont | None = None, color: Color | None = None):
+        "Add the same text to every card."
+        assert type(text) is str
+
+        logger.debug(f"Template.text({text})")
+        self._add_step(layout, TextCommand(layout, text, font, color))
+
+    def rectangle(self, layout: str, color: Color | None = None, thickness: Real | None = None):
+        "Draw a rectangle on every card."
+        logger.debug(f"Template.rect({layout})")
+        self._add_step(layout, RectangleCommand(layout, color, thickness, filled=False))
+
+    def filled_rectangle(self, layout: str, color: Color):
+        "Draw a filled rectangle on every card."
+        logger.debug(f"Template.filled_rect({layout})")
+        self._add_step(layout, RectangleCommand(layout, color, 1, filled=True))
+
+    def image(self, image: Path, layout: str):
+        "Draw the same image on every card."
+        logger.debug(f"Template.image({image})")
+        self._add_step(layout, ImageCommand(layout, image))
+    #endregion
+
+    #region Fields
+    def text_field(
+        self,
+        field: Field,
+        layout: str,
+        font: FreeTypeFont | None = None,
+        color: Color | Callable[[Record], Color | None] | None = None,
+    ):
+        """
+        Draw each record's `field` as text. `color` may also be a function
+        of the record. Values that aren't strings are converted with `str()`.
+        """
+        logger.debug(f"Template.text_field({field}, {layout})")
+        get_text = _getter(field)
+        get_color = color if callable(color) else lambda record: color
+
+        def draw(card: Card, record: Record):
+            text = get_text(record)
+            if text is not None:
+                card._add_command(TextCommand(layout, str(text), font, get_color(record)))
+
+        self._add_step(layout, draw)
+
+    def image_field(self, field: Field, layout: str, directory: str | Path | None = None):
+        "Draw the image file named by each record's `field`, relative to `directory`."
+        logger.debug(f"Template.image_field({field}, {layout})")
+        get_image = _getter(field)
+
+        def draw(card: Card, record: Record):
+            image = get_image(record)
+            if image is not None:
+                path = os.path.join(directory, image) if directory is not None else image
+                card._add_command(ImageCommand(layout, path))
+
+        self._add_step(layout, draw)
+
+    def each(self, do: Callable[[Card, Record], None], test: Callable[[Record], bool] | None = None):
+        """
+        Call `do(card, record)` for every card, or only for records where
+        `test(record)` is `True`, to draw anything fields can't describe.
+        `do` may draw on the card however it likes.
+        """
+        logger.debug(f"Template.each({do})")
+        if test is None:
+            self._steps.append(do)
+        else:
+            self._steps.append(lambda card, record: do(card, record) if test(record) else None)
+    #endregion
+
+    def card(self, record: Record) -> Card:
+        "Make the card for one record."
+        card = Card(self._width, self._height)
+        card._background = self._background
+        card._encoder = self._encoder
+        card._resampling = self._resampling
+        card._layouts = self._layouts
+        card._layouts_shared = True
+        for step in self._steps:
+            if callable(step):
+                step(card, record)
+            else:
+                card._add_command(step)
+        return card
+
+    def cards(self, records: Iterable[Record]) -> Iterator[Card]:
+        "Make cards for `records`, one at a time."
+        for record in records:
+            yield self.card(record)
+
+    def base_layer(self) -> BaseLayer | None:
+        "The drawing every card starts with: the commands before the first field."
+        length = 0
+        for step in self._steps:
+            if callable(step):
+                break
+            length += 1
+        if length == 0:
+            return None
+
+        template = Card(self._width, self._height)
+        template._background = self._background
+        template._resampling = self._resampling
+        template._commands = self._steps[:length]
+        template._layouts = {cmd.layout: self._layouts[cmd.layout] for cmd in template._commands}
+        return BaseLayer(template)
+
+    def _add_step(self, layout: str, step):
+        # catch typos now rather than at the first record
+        if layout not in self._layouts:
+            raise KeyError(f"missing layout '{layout}'")
+        self._steps.append(step)
+
+
+def _getter(field: Field) -> Callable[[Record], Any]:
+    if callable(field):
+        return field
+    return lambda record: record.get(field)
+
+
+def read_records(path: str | Path, table: str | None = None) -> Iterator[Record]:
+    """
+    Read records from a data file, picking the format from its extension:
+
+    - `.csv`: one record per row, keyed by the header row
+    - `.jsonl`: one JSON object per line
+    - `.json`: a list of objects, or an object with the list under `table`
+    - `.toml`: the array of tables named `table`
+
+    CSV and JSON Lines files are read a row at a time as records are used,
+    so they can be any size. JSON and TOML files are read all at once.
+    """
+    note_source(path)
+    match Path(path).suffix.lower():
+        case '.csv':
+            with open(path, newline='') as csv_in:
+                yield from csv.DictReader(csv_in)
+        case '.jsonl':
+            with open(path) as jsonl_in:
+                for line in jsonl_in:
+                    if line.strip():
+                        yield json.loads(line)
+        case '.json':
+            with open(path) as json_in:
+                data = json.load(json_in)
+            yield from data[table] if table is not None else data
+        case '.toml':
+            import tomllib
+            with open(path, 'rb') as toml_in:
+                data = tomllib.load(toml_in)
+            if table is None:
+                raise ValueError("TOML records need a `table` name")
+            yield from data[table]
+        case suffix:
+            raise ValueError(f"don't know how to read records from '{suffix}' files")
+
+
+__all__ = [
+    'Template',
+    'read_records',
+]
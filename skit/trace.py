@@ -0,0 +1,162 @@
+"""
+Finding out where render time goes.
+
+Tracing is off unless you ask for it. Inside a `tracing()` block, Skit
+records a span for every card, every draw operation, every art decode, and
+every encode-and-write:
+
+```python
+import skit.trace
+
+with skit.trace.tracing() as tracer:
+    deck.render_png('card_{index}.png')
+
+print(tracer.format_summary())
+tracer.write_chrome_trace('trace.json')   # open in ui.perfetto.dev or chrome://tracing
+```
+
+Only work done in the current process is recorded. Cards rendered with
+`workers=` are drawn in other processes, so their spans are missing; trace
+without workers to see them.
+"""
+from contextlib import contextmanager, nullcontext
+import json
+import os
+import threading
+import time
+from typing import Any, Iterator, NamedTuple
+
+
+class Span(NamedTuple):
+    "One timed piece of work."
+    name: str
+    """What was done, like `'text'` or `'decode'`."""
+    category: str
+    """What kind of work it was: `'card'`, `'op'`, `'asset'`, or `'encode'`."""
+    start: int
+    """When it started, in nanoseconds on the `time.perf_counter_ns()` clock."""
+    duration: int
+    """How long it took, in nanoseconds."""
+    thread: int
+    """The thread it ran on."""
+    args: dict[str, Any] | None
+    """Extra details, like the layout name."""
+
+
+class SpanSummary(NamedTuple):
+    "Totals for every span with the same category and name."
+    category: str
+    name: str
+    count: int
+    total: float
+    """Total seconds."""
+    mean: float
+    """Average seconds."""
+    longest: float
+    """Longest single span, in seconds."""
+
+
+class Tracer:
+    "Collects spans. Get one from `tracing()`."
+    def __init__(self):
+        self.spans: list[Span] = []
+        """Every span recorded so far, in the order they finished."""
+
+    @contextmanager
+    def span(self, name: str, category: str, **args) -> Iterator[None]:
+        "Time the body of a `with` block."
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            # list.append is atomic, so writer threads can record safely
+            self.spans.append(Span(
+                name, category, start, time.perf_counter_ns() - start,
+                threading.get_ident(), args or None,
+            ))
+
+    def summary(self) -> list[SpanSummary]:
+        "Totals by category and name, most expensive first."
+        totals: dict[tuple[str, str], list[int]] = {}
+        for span in self.spans:
+            entry = totals.setdefault((span.category, span.name), [0, 0, 0])
+            entry[0] += 1
+            entry[1] += span.duration
+            entry[2] = max(entry[2], span.duration)
+
+        return sorted(
+            (
+                SpanSummary(category, name, count, total / 1e9, total / count / 1e9, longest / 1e9)
+                for (category, name), (count, total, longest) in totals.items()
+            ),
+            key=lambda summary: summary.total,
+            reverse=True,
+        )
+
+    def format_summary(self) -> str:
+        "The summary as a table, ready to print."
+        lines = [f"{'category':8} {'name':12} {'count':>8} {'total s':>10} {'mean ms':>10} {'max ms':>10}"]
+        for s in self.summary():
+            lines.append(
+                f"{s.category:8} {s.name:12} {s.count:8} {s.total:10.3f} {s.mean * 1e3:10.3f} {s.longest * 1e3:10.3f}"
+            )
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        "The spans in Chrome's trace event format, which Perfetto also reads."
+        pid = os.getpid()
+        return {
+            'traceEvents': [
+                {
+                    'name': span.name,
+                    'cat': span.category,
+                    'ph': 'X',
+                    'ts': span.start / 1e3,
+                    'dur': span.duration / 1e3,
+                    'pid': pid,
+                    'tid': span.thread,
+                    **({'args': {k: str(v) for k, v in span.args.items()}} if span.args else {}),
+                }
+                for span in self.spans
+            ],
+            'displayTimeUnit': 'ms',
+        }
+
+    def write_chrome_trace(self, filename: str):
+        "Save the spans as a Chrome trace / Perfetto JSON file."
+        with open(filename, 'w') as trace_out:
+            json.dump(self.chrome_trace(), trace_out)
+
+
+_active: Tracer | None = None
+_NOT_TRACING = nullcontext()
+
+
+@contextmanager
+def tracing() -> Iterator[Tracer]:
+    "Record spans for everything rendered inside the `with` block."
+    global _active
+    previous, _active = _active, Tracer()
+    try:
+        yield _active
+    finally:
+        _active = previous
+
+
+def span(name: str, category: str, **args):
+    """
+    Time the body of a `with` block if tracing is on. When it's off this
+    returns a shared do-nothing context manager, so it costs very little.
+    """
+    if _active is None:
+        return _NOT_TRACING
+    return _active.span(name, category, **args)
+
+
+__all__ = [
+    'Span',
+    'SpanSummary',
+    'Tracer',
+    'tracing',
+    'span',
+]
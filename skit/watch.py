@@ -0,0 +1,237 @@
+"""
+Re-rendering cards as the files they're made from change.
+
+While working on a design, `watch()` keeps a deck's PNGs up to date. Edit
+the data, a layout, a piece of art, or a font, and only the cards that look
+different are drawn again:
+
+```python
+import skit.watch
+
+def build():
+    layouts = skit.load_layouts('cards.toml', table='layout')
+    records = skit.template.read_records('cards.toml', table='cards')
+    template = skit.Template(750, 1050)
+    template.layouts_map(layouts)
+    ...
+    return skit.Deck.from_records(records, template)
+
+skit.watch.watch(build, 'card_{index}.png')
+```
+
+`build` should return a `skit.Deck` or a stream from `Deck.from_records()`,
+and is run again whenever a file it read changes. Files read through
+`skit.load_layouts()` and `skit.template.read_records()` are noticed on
+their own; name any others with `files`. Art and fonts don't need naming:
+each card's own are watched, and a change to one redraws just the cards
+using it, without running `build` again.
+
+Everything stays in one process, so loaded fonts and decoded art are still
+cached from one change to the next.
+"""
+from __future__ import annotations
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Callable, Iterable
+import warnings
+from skit._manifest import recording_sources
+from skit.cache import text_cache
+from skit.fonts import FontRef, pack_font, unpack_font, _forget
+from skit.render import TextCommand, ImageCommand
+
+if TYPE_CHECKING:
+    from skit.card import Card
+
+
+logger = logging.getLogger(__file__)
+
+
+class Watcher:
+    """
+    Keeps the PNGs for the cards from `build` up to date. `start()` renders
+    them all, then each `poll()` looks for changed files and redraws the
+    cards they affect.
+    """
+    def __init__(
+        self,
+        build: Callable[[], Iterable[Card]],
+        filename: str,
+        files: Iterable[str | os.PathLike] = (),
+    ):
+        """
+        Watch the cards `build` makes, writing each to `filename` with
+        `{index}` filled in. Changes to any of `files` run `build` again.
+        """
+        if '{index}' not in filename:
+            warnings.warn("'{index}' isn't in the filename, so images may overwrite one another")
+
+        self._build = build
+        self._filename = filename
+        self._files = {os.path.abspath(path) for path in files}
+        self._cards: list[Card] = []
+        # the content hash of the card in each output file
+        self._rendered: list[str | None] = []
+        # files build() read, and the cards using each art or font file
+        self._sources: set[str] = set()
+        self._uses: dict[str, set[int]] = {}
+        self._fonts: set[str] = set()
+        self._stamps: dict[str, tuple[int, int] | None] = {}
+
+    def start(self) -> list[int]:
+        "Build the cards and render them. Returns the indices of those drawn."
+        if not self._rebuild():
+            return []
+        return self._render(range(len(self._cards)))
+
+    def poll(self) -> list[int]:
+        """
+        Look for changed files once, and redraw the cards they affect.
+        Returns the indices of the cards drawn.
+        """
+        changed = []
+        for path, stamp in self._stamps.items():
+            if _stamp(path) != stamp:
+                changed.append(path)
+        if not changed:
+            return []
+        logger.info(f"changed: {', '.join(changed)}")
+        for path in changed:
+            self._stamps[path] = _stamp(path)
+
+        fonts = [path for path in changed if path in self._fonts]
+        for path in fonts:
+            _forget(path)
+        if fonts:
+            # rasterized text is kept by font name, not font file contents
+            text_cache.clear()
+
+        if any(path in self._sources for path in changed):
+            if not self._rebuild():
+                return []
+            affected = range(len(self._cards))
+        else:
+            affected = sorted(set().union(*(self._uses.get(path, ()) for path in changed)))
+            if fonts:
+                for index in affected:
+                    _refresh_fonts(self._cards[index])
+        return self._render(affected)
+
+    def run(self, interval: float = 0.5):
+        "Render the cards, then keep them up to date until interrupted."
+        self.start()
+        logger.info(f"watching {len(self._stamps)} files")
+        try:
+            while True:
+                time.sleep(interval)
+                self.poll()
+        except KeyboardInterrupt:
+            pass
+
+    def _rebuild(self) -> bool:
+        logger.debug("building cards")
+        with recording_sources() as sources:
+            try:
+                cards = list(self._build())
+            except Exception:
+                # half-saved files are common while editing, so keep the
+                # cards from last time and wait for the next change
+                logger.exception("building the cards failed")
+                self._watch(sources)
+                return False
+
+        if len(cards) < len(self._cards):
+            logger.info(f"deck shrank to {len(cards)} cards; files for the rest are left alone")
+        self._cards = cards
+        self._rendered = (self._rendered + [None] * len(cards))[:len(cards)]
+        self._sources = sources | self._files
+
+        self._uses = {}
+        self._fonts = set()
+        for index, card in enumerate(cards):
+            # fonts loaded before a font file changed are swapped for new ones
+            _refresh_fonts(card)
+            for path, is_font in _dependencies(card):
+                self._uses.setdefault(path, set()).add(index)
+                if is_font:
+                    self._fonts.add(path)
+        self._watch(self._sources | self._uses.keys())
+        return True
+
+    def _watch(self, paths: Iterable[str]):
+        for path in paths:
+            if path not in self._stamps:
+                self._stamps[path] = _stamp(path)
+
+    def _render(self, indices: Iterable[int]) -> list[int]:
+        drawn = []
+        for index in indices:
+            card = self._cards[index]
+            try:
+                digest = card.content_hash()
+                if digest is not None and digest == self._rendered[index]:
+                    continue
+                card.render_png(self._filename.format_map({'index': index}))
+            except Exception:
+                # missing or broken art shouldn't end the session
+                logger.exception(f"rendering card {index} failed")
+                self._rendered[index] = None
+                continue
+            self._rendered[index] = digest
+            drawn.append(index)
+        if drawn:
+            logger.info(f"rendered {len(drawn)} cards: {', '.join(map(str, drawn))}")
+        return drawn
+
+
+def watch(
+    build: Callable[[], Iterable[Card]],
+    filename: str,
+    files: Iterable[str | os.PathLike] = (),
+    interval: float = 0.5,
+):
+    """
+    Render the cards from `build` to `filename`, then keep redrawing the
+    ones affected by changes, checking every `interval` seconds until
+    interrupted. See `Watcher`.
+    """
+    Watcher(build, filename, files).run(interval)
+
+
+def _dependencies(card: Card) -> Iterable[tuple[str, bool]]:
+    "The art and font files `card` draws with, and whether each is a font."
+    for cmd in card._commands:
+        match cmd:
+            case ImageCommand():
+                yield os.path.abspath(cmd.image), False
+            case TextCommand():
+                ref = pack_font(cmd.font)
+                if isinstance(ref, FontRef):
+                    yield os.path.abspath(ref.path), True
+
+
+def _refresh_fonts(card: Card):
+    # a forgotten font loads again from its file; current ones come back as is
+    commands = []
+    for cmd in card._commands:
+        if isinstance(cmd, TextCommand):
+            ref = pack_font(cmd.font)
+            if isinstance(ref, FontRef) and unpack_font(ref) is not cmd.font:
+                cmd = cmd._replace(font=unpack_font(ref))
+        commands.append(cmd)
+    if any(new is not old for new, old in zip(commands, card._commands)):
+        card._commands = commands
+
+
+def _stamp(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+__all__ = [
+    'Watcher',
+    'watch',
+]
@@ -0,0 +1,207 @@
+"""
+Benchmark Skit on synthetic decks.
+
+Builds decks of several sizes that use every kind of draw command, then
+times each phase (building the deck, render_png, and single- and
+multi-file render_pdf) and records peak memory. Each phase runs in its own
+process so memory numbers don't bleed into one another. It also times
+`import skit` in a fresh interpreter, since worker processes and short
+scripts pay for it every time.
+
+    python tools/benchmark.py                          # run everything
+    python tools/benchmark.py --sizes 10,1000          # skip the big deck
+    python tools/benchmark.py --output new.json --baseline old.json
+
+With `--baseline`, phases slower than the baseline by more than
+`--threshold` are reported and the script exits with status 1. It also
+exits with status 1 if importing Skit takes longer than `--import-budget`.
+"""
+import argparse
+import json
+import os.path
+import pathlib
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+
+BASE_DIR = os.path.dirname(__file__)
+ROOT_DIR = pathlib.Path(BASE_DIR, '..')
+ASSETS_DIR = pathlib.Path(ROOT_DIR, 'examples', 'assets')
+
+PHASES = ['import', 'construct', 'render_png', 'render_pdf_single', 'render_pdf_multiple']
+DEFAULT_SIZES = [10, 1000, 10000]
+IMPORT_RUNS = 5
+
+
+def build_deck(card_count: int, font_path: str | None):
+    "A deck that exercises text, both kinds of rectangle, and every Scale mode."
+    import skit
+
+    font = skit.load_font(font_path, 24) if font_path else None
+    art = sorted(ASSETS_DIR.glob('*.png'))
+    scales = list(skit.Scale)
+
+    deck = skit.Deck(card_count, 375, 525)
+    deck.background('#eeeeee')
+    deck.layouts_map({
+        'border': skit.LayoutDef(0, 0, 374, 524),
+        'title': skit.LayoutDef(15, 10, 345, 40, v_align=skit.Alignment.MIDDLE),
+        'art': skit.LayoutDef(20, 60, 335, 200, h_align=skit.Alignment.MIDDLE, v_align=skit.Alignment.MIDDLE),
+        **{
+            f'art_{scale.value}': skit.LayoutDef(
+                20 + i * 85, 270, 80, 80,
+                h_align=skit.Alignment.MIDDLE, v_align=skit.Alignment.MIDDLE, scale=scale,
+            )
+            for i, scale in enumerate(scales)
+        },
+        'textbox': skit.LayoutDef(20, 360, 335, 120),
+        'text': skit.LayoutDef(30, 370, 315, 100),
+        'stats': skit.LayoutDef(290, 485, 70, 30, h_align=skit.Alignment.END, v_align=skit.Alignment.END),
+    })
+    deck.rectangle('border', 'black', 6)
+    deck.rectangle('border', 'white', 3)
+    deck.texts([f"Card {i}" for i in range(card_count)], 'title', font, 'navy')
+    deck.rectangle('art', 'gray')
+    deck.images([art[i % len(art)] for i in range(card_count)], 'art')
+    for scale in scales:
+        deck.images([art[(i + 1) % len(art)] for i in range(card_count)], f'art_{scale.value}')
+    deck.filled_rectangle('textbox', '#dddddd')
+    deck.texts([f"Rules text number {i % 50}" for i in range(card_count)], 'text', font)
+    deck.text("2/2", 'stats', font)
+    return deck
+
+
+def run_phase(phase: str, card_count: int, font_path: str | None) -> dict:
+    "Run one phase in this process and measure it."
+    if phase == 'import':
+        started = time.perf_counter()
+        import skit
+        return {'seconds': time.perf_counter() - started, 'peak_rss_mb': peak_rss_mb()}
+
+    import skit     # don't count the import as part of the phase
+
+    started = time.perf_counter()
+    deck = build_deck(card_count, font_path)
+    built = time.perf_counter()
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        match phase:
+            case 'construct':
+                pass
+            case 'render_png':
+                deck.render_png(os.path.join(out_dir, 'card_{index}.png'))
+            case 'render_pdf_single':
+                deck.render_pdf(os.path.join(out_dir, 'deck.pdf'), resolution=150)
+            case 'render_pdf_multiple':
+                deck.render_pdf(os.path.join(out_dir, 'card_{index}.pdf'), resolution=150, single_file=False)
+            case _:
+                raise ValueError(f"unknown phase '{phase}'")
+        finished = time.perf_counter()
+
+    return {
+        'seconds': (finished - started) if phase == 'construct' else (finished - built),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None     # not available on Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_isolated(phase: str, card_count: int, font_path: str | None) -> dict:
+    "Run one phase in a fresh interpreter and collect its measurements."
+    command = [sys.executable, __file__, '--run-phase', phase, str(card_count)]
+    if font_path:
+        command += ['--font', font_path]
+    result = subprocess.run(
+        command, capture_output=True, text=True, check=True,
+        env={**os.environ, 'PYTHONPATH': os.pathsep.join([str(ROOT_DIR.resolve()), os.environ.get('PYTHONPATH', '')])},
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    "Describe every phase that got slower than `threshold` times the baseline."
+    regressions = []
+    for key, current in results['phases'].items():
+        previous = baseline.get('phases', {}).get(key)
+        if previous is None:
+            continue
+        ratio = current['seconds'] / previous['seconds'] if previous['seconds'] else 1.0
+        print(f"  {key:32} {previous['seconds']:9.3f}s -> {current['seconds']:9.3f}s  ({ratio:5.2f}x)")
+        if ratio > threshold:
+            regressions.append(f"{key} is {ratio:.2f}x slower than the baseline")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help="comma-separated deck sizes (default: %(default)s)")
+    parser.add_argument('--phases', default=','.join(PHASES),
+                        help="comma-separated phases to run (default: all)")
+    parser.add_argument('--font', help="TrueType font to draw text with (default: Skit's fallback font)")
+    parser.add_argument('--output', default='benchmark.json', help="where to save results (default: %(default)s)")
+    parser.add_argument('--baseline', help="earlier results to compare against")
+    parser.add_argument('--threshold', type=float, default=1.10,
+                        help="slowdown ratio that counts as a regression (default: %(default)s)")
+    parser.add_argument('--import-budget', type=float, default=100,
+                        help="milliseconds `import skit` may take (default: %(default)s)")
+    parser.add_argument('--run-phase', nargs=2, metavar=('PHASE', 'SIZE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_phase:
+        phase, size = args.run_phase
+        print(json.dumps(run_phase(phase, int(size), args.font)))
+        return
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'phases': {},
+    }
+    phases = args.phases.split(',')
+    over_budget = []
+    if 'import' in phases:
+        # imports are quick and noisy, so keep the best of a few runs
+        measured = min((run_isolated('import', 0, None) for _ in range(IMPORT_RUNS)), key=lambda m: m['seconds'])
+        results['phases']['import'] = measured
+        print(f"{'import':20} {'':12} {measured['seconds']:9.3f}s")
+        if measured['seconds'] * 1000 > args.import_budget:
+            over_budget.append(f"import skit took {measured['seconds'] * 1000:.0f} ms, over the {args.import_budget:.0f} ms budget")
+
+    for size in [int(s) for s in args.sizes.split(',')]:
+        for phase in [phase for phase in phases if phase != 'import']:
+            measured = run_isolated(phase, size, args.font)
+            results['phases'][f"{phase}[{size}]"] = measured
+            rss = f"{measured['peak_rss_mb']:8.1f} MB" if measured['peak_rss_mb'] is not None else ''
+            print(f"{phase:20} {size:6} cards  {measured['seconds']:9.3f}s  {rss}")
+
+    with open(args.output, 'w') as json_out:
+        json.dump(results, json_out, indent=2)
+    print(f"saved {args.output}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as json_in:
+            baseline = json.load(json_in)
+        print(f"compared to {args.baseline}:")
+        regressions = compare(results, baseline, args.threshold)
+    for regression in regressions + over_budget:
+        print(f"REGRESSION: {regression}")
+    if regressions or over_budget:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()